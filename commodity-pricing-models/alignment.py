@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pandas as pd
+
+# COT positions are as of Tuesday and published the following Friday
+COT_PUBLICATION_LAG = pd.Timedelta(days=3)
+
+# Monthly indicators are known once their month has closed: available this long after the
+# month's last day
+INDICATOR_PUBLICATION_LAG = pd.Timedelta(days=1)
+
+# (output column suffix, COT column)
+COT_FEATURES = [
+    ("MM Net", "Net_Position"),
+    ("MM % OI", "Percent_of_OpenInterest"),
+]
+
+def read_cot_csv(path):
+    cot_data = pd.read_csv(path)
+    cot_data["Report_Date"] = pd.to_datetime(cot_data["Report_Date"])
+    return cot_data
+
+def get_cot_label(path):
+    # corn.csv -> Corn, soybean_meal.csv -> Soybean Meal
+    return os.path.splitext(os.path.basename(path))[0].replace("_", " ").title()
+
+class AsOfAligner:
+    def __init__(self, timeline):
+        self.timeline = pd.to_datetime(pd.Series(timeline)).to_numpy(dtype="datetime64[ns]")
+        self.series = []
+
+    def add_series(self, data, date_column="Date", columns=None, lag=None, inclusive=True, tolerance=None, rename=None, date_label=None):
+        # A row becomes known at date + lag; each timeline date takes the last row known by then
+        # (on or before it when inclusive, strictly before otherwise), so nothing is looked up ahead
+        columns = list(columns) if columns is not None else [column for column in data.columns if column != date_column]
+        available = pd.to_datetime(data[date_column])
+        if lag is not None:
+            available = available + lag
+
+        order = np.argsort(available.to_numpy(dtype="datetime64[ns]"), kind="stable")
+        self.series.append({
+            "available": available.to_numpy(dtype="datetime64[ns]")[order],
+            "values": {column: data[column].to_numpy()[order] for column in columns},
+            "inclusive": inclusive,
+            "tolerance": tolerance,
+            "rename": rename or {},
+            "date_label": date_label,
+        })
+        return self
+
+    def get_positions(self, series):
+        side = "right" if series["inclusive"] else "left"
+        positions = np.searchsorted(series["available"], self.timeline, side=side) - 1
+        matched = positions >= 0
+
+        if series["tolerance"] is not None and len(series["available"]):
+            age = self.timeline - series["available"][np.clip(positions, 0, None)]
+            matched &= age <= np.timedelta64(pd.Timedelta(series["tolerance"]))
+        return positions, matched
+
+    def align(self):
+        aligned = {}
+        for series in self.series:
+            positions, matched = self.get_positions(series)
+            gather = np.clip(positions, 0, None)
+
+            if series["date_label"] is not None:
+                dates = series["available"][gather] if len(series["available"]) else np.full(len(gather), np.datetime64("NaT"), dtype="datetime64[ns]")
+                aligned[series["date_label"]] = np.where(matched, dates, np.datetime64("NaT"))
+
+            for column, values in series["values"].items():
+                name = series["rename"].get(column, column)
+                if not len(values):
+                    aligned[name] = np.full(len(gather), np.nan)
+                    continue
+                picked = pd.Series(values[gather])
+                aligned[name] = picked.where(matched).to_numpy()
+        return pd.DataFrame(aligned)
+
+    def add_cot_positions(self, paths, lag=COT_PUBLICATION_LAG):
+        for path in paths:
+            label = get_cot_label(path)
+            self.add_series(
+                read_cot_csv(path),
+                "Report_Date",
+                columns=[column for _, column in COT_FEATURES],
+                lag=lag,
+                inclusive=False,
+                rename={column: f"{feature}, {label}" for feature, column in COT_FEATURES},
+            )
+        return self
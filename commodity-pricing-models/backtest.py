@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from model_training import MODEL_PARAMETERS, MODEL_TARGETS
+
+WINDOW_TYPES = ("expanding", "rolling")
+
+def get_forest_params(params):
+    # Accepts ModelTrainer's best_params (regressor__ prefixed) as well as plain forest params
+    params = {name.replace("regressor__", ""): value for name, value in (params or {}).items()}
+    params.setdefault("n_estimators", 100)
+    params.setdefault("random_state", 42)
+    return params
+
+def fit_trees(X, y, params, n_estimators, random_state):
+    forest = RandomForestRegressor(**{**params, "n_estimators": n_estimators, "random_state": random_state})
+    return list(forest.fit(X, y).estimators_)
+
+def predict_trees(trees, X):
+    return np.mean([tree.predict(X) for tree in trees], axis=0)
+
+def get_anchors(positions, min_train_size, trees_per_refit, full_refit_every):
+    # Release whose full refit each release's forest descends from. Full refits fall on fixed
+    # releases (every full_refit_every-th from the first), so a release's forest does not depend
+    # on how the releases are split between workers or which of them were reused
+    positions = np.asarray(positions)
+    if not trees_per_refit:
+        return positions
+    return positions - (positions - min_train_size) % full_refit_every
+
+def run_backtest_chunk(X, y, positions, starts, params, trees_per_refit, full_refit_every, min_train_size):
+    # Walks one block of releases in order; the block starts at an anchor release. Anchors fit
+    # the whole forest; in between, the forest is rolled forward by replacing its oldest
+    # trees_per_refit trees with trees fitted on the new window. The scaler fitted at the last
+    # full refit is reused, so all trees share one feature scale.
+    n_estimators = params["n_estimators"]
+    anchors = get_anchors(positions, min_train_size, trees_per_refit, full_refit_every)
+    trees, scaler = [], None
+    results = []
+
+    for position, start, anchor in zip(positions, starts, anchors):
+        X_train, y_train = X[start:position], y[start:position]
+        refit_start = time.perf_counter()
+
+        if position == anchor:
+            scaler = StandardScaler().fit(X_train)
+            trees = fit_trees(scaler.transform(X_train), y_train, params, n_estimators, params["random_state"] + position)
+            refit = "full"
+        else:
+            new_trees = fit_trees(scaler.transform(X_train), y_train, params, trees_per_refit, params["random_state"] + position)
+            trees = trees[len(new_trees):] + new_trees
+            refit = "warm"
+
+        prediction = predict_trees(trees, scaler.transform(X[position : position + 1]))[0]
+        results.append((position, start, refit, time.perf_counter() - refit_start, prediction))
+    return results
+
+class WalkForwardBacktester:
+    def __init__(
+        self,
+        data,
+        params=None,
+        parameters=MODEL_PARAMETERS,
+        targets=MODEL_TARGETS,
+        date_column="Date",
+        window="expanding",
+        window_size=120,
+        min_train_size=60,
+        trees_per_refit=10,
+        full_refit_every=12,
+        max_workers=None,
+    ):
+        if window not in WINDOW_TYPES:
+            raise ValueError(f"Unknown window type: {window}")
+
+        self.parameters = list(parameters)
+        self.targets = list(targets)
+        self.date_column = date_column
+        self.window = window
+        self.window_size = window_size
+        self.min_train_size = min_train_size
+        self.trees_per_refit = trees_per_refit
+        self.full_refit_every = max(full_refit_every, 1)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.params = get_forest_params(params)
+
+        # One row per WASDE release, oldest first
+        data = data.copy()
+        data[date_column] = pd.to_datetime(data[date_column])
+        data = data.sort_values(date_column, kind="stable")
+        self.data = data[[date_column] + self.parameters + self.targets].dropna().reset_index(drop=True)
+        self.X = self.data[self.parameters].to_numpy(dtype=np.float64)
+        self.y = self.data[self.targets].to_numpy(dtype=np.float64)
+
+        self.row_hashes = pd.util.hash_pandas_object(self.data, index=False).to_numpy()
+        self.run_report = None
+
+    def get_config(self):
+        return {
+            "params": self.params,
+            "parameters": self.parameters,
+            "targets": self.targets,
+            "window": self.window,
+            "window_size": self.window_size if self.window == "rolling" else None,
+            "trees_per_refit": self.trees_per_refit,
+            "full_refit_every": self.full_refit_every,
+        }
+
+    def get_releases(self):
+        # (release position, first training row) for every release with enough history
+        positions = np.arange(self.min_train_size, len(self.data))
+        if self.window == "rolling":
+            starts = np.maximum(positions - self.window_size, 0)
+        else:
+            starts = np.zeros(len(positions), dtype=int)
+        return positions, starts
+
+    def get_anchors(self, positions):
+        return get_anchors(positions, self.min_train_size, self.trees_per_refit, self.full_refit_every)
+
+    def get_input_hash(self, position, anchor, anchor_start):
+        # Covers the backtest config, the anchor release and every row from the anchor's training
+        # window to the scored release, so revised history or a new config invalidates exactly the
+        # releases whose forests depend on it
+        config = {**self.get_config(), "anchor": int(anchor), "position": int(position)}
+        digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode())
+        digest.update(self.row_hashes[anchor_start : position + 1].tobytes())
+        return digest.hexdigest()
+
+    def run(self, previous=None):
+        positions, starts = self.get_releases()
+        if not len(positions):
+            raise ValueError(
+                f"No releases to backtest: {len(self.data)} complete rows, min_train_size={self.min_train_size}"
+            )
+        anchors = self.get_anchors(positions)
+        anchor_indices = anchors - self.min_train_size
+        input_hashes = [
+            self.get_input_hash(position, anchor, starts[index])
+            for position, anchor, index in zip(positions, anchors, anchor_indices)
+        ]
+
+        reusable = np.zeros(len(positions), dtype=bool)
+        if previous is not None and len(previous):
+            reusable = pd.Series(input_hashes).isin(set(previous["Input Hash"])).to_numpy()
+
+        # A pending warm release needs its forest rebuilt from its anchor, so every release from
+        # the anchor up to the last pending one in that group is rerun
+        pending = ~reusable
+        last_pending = pd.Series(np.where(pending, np.arange(len(positions)), -1)).groupby(anchor_indices).transform("max").to_numpy()
+        pending = np.arange(len(positions)) <= last_pending
+        reused = pd.DataFrame()
+        if reusable.any():
+            reused_hashes = set(np.asarray(input_hashes, dtype=object)[~pending])
+            reused = previous[previous["Input Hash"].isin(reused_hashes)]
+
+        start_time = time.perf_counter()
+        results = []
+        if pending.any():
+            # Chunks only break at anchors, so each worker starts on a full refit
+            groups = np.split(np.flatnonzero(pending), np.flatnonzero(np.diff(anchor_indices[pending]) != 0) + 1)
+            chunks = [
+                np.concatenate([groups[i] for i in group_indices])
+                for group_indices in np.array_split(np.arange(len(groups)), min(self.max_workers, len(groups)))
+                if len(group_indices)
+            ]
+            args = [
+                (
+                    self.X,
+                    self.y,
+                    positions[chunk],
+                    starts[chunk],
+                    self.params,
+                    self.trees_per_refit,
+                    self.full_refit_every,
+                    self.min_train_size,
+                )
+                for chunk in chunks
+            ]
+
+            if self.max_workers == 1 or len(chunks) == 1:
+                chunk_results = [run_backtest_chunk(*arg) for arg in args]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    chunk_results = list(executor.map(run_backtest_chunk, *zip(*args)))
+            results = [result for chunk_result in chunk_results for result in chunk_result]
+
+        hash_by_position = dict(zip(positions, input_hashes))
+        predictions = pd.DataFrame([
+            {
+                "Date": self.data[self.date_column].iloc[position],
+                "Train Start": self.data[self.date_column].iloc[start],
+                "Train Size": position - start,
+                "Refit": refit,
+                "Seconds": seconds,
+                **{target: self.y[position, i] for i, target in enumerate(self.targets)},
+                **{f"{target} Predicted": prediction[i] for i, target in enumerate(self.targets)},
+                "Input Hash": hash_by_position[position],
+            }
+            for position, start, refit, seconds, prediction in results
+        ])
+
+        predictions = pd.concat([frame for frame in [reused, predictions] if len(frame)], ignore_index=True)
+        predictions = predictions.sort_values("Date", kind="stable").reset_index(drop=True)
+        for target in self.targets:
+            predictions[f"{target} Error"] = predictions[f"{target} Predicted"] - predictions[target]
+
+        self.run_report = {
+            "releases": len(positions),
+            "refitted": len(results),
+            "reused": len(reused),
+            "seconds": time.perf_counter() - start_time,
+        }
+        return predictions
+
+    def check(self, max_workers=None, holdout=3):
+        # Reruns the backtest sequentially, across max_workers workers and incrementally (from a
+        # sequential run missing its last `holdout` releases and one warm release per anchor
+        # group); returns the names of the runs whose predictions differ from the sequential run
+        configured_workers = self.max_workers
+        try:
+            self.max_workers = 1
+            expected = self.run()
+            self.max_workers = max_workers or os.cpu_count() or 1
+            parallel = self.run()
+
+            dropped = np.zeros(len(expected), dtype=bool)
+            dropped[-holdout:] = True
+            dropped[expected["Refit"].eq("warm").to_numpy() & (np.arange(len(expected)) % self.full_refit_every == self.full_refit_every // 2)] = True
+            incremental = self.run(expected[~dropped])
+        finally:
+            self.max_workers = configured_workers
+
+        columns = [column for column in expected.columns if column != "Seconds"]
+        return [
+            name
+            for name, predictions in [("parallel", parallel), ("incremental", incremental)]
+            if not predictions[columns].equals(expected[columns])
+        ]
+
+    def get_metrics(self, predictions):
+        # Error metrics per target, over all releases and per calendar year
+        periods = [("All", predictions)] + [
+            (str(year), group) for year, group in predictions.groupby(predictions["Date"].dt.year)
+        ]
+
+        metrics = []
+        for period, group in periods:
+            for target in self.targets:
+                error = group[f"{target} Error"]
+                metrics.append({
+                    "Period": period,
+                    "Target": target,
+                    "Releases": len(group),
+                    "MAE": error.abs().mean(),
+                    "RMSE": np.sqrt((error ** 2).mean()),
+                    "MAPE": (error.abs() / group[target].abs()).mean() * 100,
+                    "Bias": error.mean(),
+                })
+        return pd.DataFrame(metrics)
+
+    def run_to_parquet(self, predictions_path, metrics_path, incremental=True):
+        previous = None
+        if incremental and os.path.exists(predictions_path):
+            previous = pd.read_parquet(predictions_path)
+
+        predictions = self.run(previous)
+        predictions.to_parquet(predictions_path, index=False)
+        self.get_metrics(predictions).to_parquet(metrics_path, index=False)
+        return predictions
+
+def main(argv=None):
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the soybean price model.")
+    parser.add_argument("--data", default=os.path.join(data_dir, "processed", "soybeans_model_training_data.parquet"))
+    parser.add_argument("--output-dir", default=os.path.join(data_dir, "backtest"))
+    parser.add_argument("--window", choices=WINDOW_TYPES, default="expanding")
+    parser.add_argument("--window-size", type=int, default=120, help="releases in a rolling training window")
+    parser.add_argument("--min-train-size", type=int, default=60)
+    parser.add_argument("--trees-per-refit", type=int, default=10, help="0 refits the whole forest at every release")
+    parser.add_argument("--full-refit-every", type=int, default=12)
+    parser.add_argument("--params", type=json.loads, default=None, help="forest params as JSON, e.g. ModelTrainer best_params")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--full", action="store_true", help="ignore previous predictions and rerun every release")
+    parser.add_argument("--check", action="store_true", help="check that worker count and reuse do not change predictions")
+    args = parser.parse_args(argv)
+
+    reader = pd.read_parquet if args.data.endswith(".parquet") else pd.read_csv
+    backtester = WalkForwardBacktester(
+        reader(args.data),
+        params=args.params,
+        window=args.window,
+        window_size=args.window_size,
+        min_train_size=args.min_train_size,
+        trees_per_refit=args.trees_per_refit,
+        full_refit_every=args.full_refit_every,
+        max_workers=args.max_workers,
+    )
+
+    if args.check:
+        mismatches = backtester.check(args.max_workers)
+        print(f"Predictions differ from the sequential run: {', '.join(mismatches)}" if mismatches else "Predictions match")
+        return 1 if mismatches else 0
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    backtester.run_to_parquet(
+        os.path.join(args.output_dir, f"backtest_{args.window}_predictions.parquet"),
+        os.path.join(args.output_dir, f"backtest_{args.window}_metrics.parquet"),
+        incremental=not args.full,
+    )
+    print(json.dumps(backtester.run_report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from price_processor import PriceProcessor
+from wasde_processor import WASDEProcessor
+from synthetic_data import (
+    generate_contract_csvs,
+    generate_indicators_csv,
+    generate_report_dates,
+    generate_trading_dates,
+    generate_wasde_csvs,
+)
+
+BENCHMARKS = [
+    "process_raw_price_data",
+    "process_continuous_data",
+    "process_year_ahead_pricing_data",
+    "aggregate_model_input_data",
+    "process_csv_by_path",
+    "aggregate_wasde_data",
+    "filter_soybeans_wasde_data",
+    "append_indicators",
+]
+
+class BenchmarkSuite:
+    # `scale` multiplies the commodity count: one contract history per commodity and
+    # extra report titles in every WASDE release. `years` sets the history length
+    def __init__(self, work_dir, scale=1, years=25, storage_format="json", seed=0):
+        self.work_dir = work_dir
+        self.scale = scale
+        self.years = years
+        self.storage_format = storage_format
+        self.seed = seed
+
+        self.wasde_dir = os.path.join(work_dir, "raw", "wasde")
+        self.interim_dir = os.path.join(work_dir, "interim")
+        self.indicators_path = os.path.join(self.interim_dir, "macroeconomic_indicators.csv")
+        self.wasde_path = os.path.join(self.interim_dir, "wasde.parquet")
+        self.wasde_aggregate_path = os.path.join(self.interim_dir, "wasde_aggregate.parquet")
+        self.wasde_soybeans_path = os.path.join(self.interim_dir, "wasde_soybeans.parquet")
+        self.model_input_path = os.path.join(self.interim_dir, "model_input_data.parquet")
+
+        self.wasde = WASDEProcessor(csv_dir=self.wasde_dir, max_workers=1)
+        self.commodities = []
+
+    def setup(self):
+        os.makedirs(self.interim_dir, exist_ok=True)
+
+        self.trading_dates = generate_trading_dates(years=self.years)
+        self.report_dates = generate_report_dates(self.trading_dates)
+        self.wasde_csv_paths = generate_wasde_csvs(self.wasde_dir, self.report_dates, self.scale, self.seed)
+        generate_indicators_csv(self.indicators_path, self.report_dates, self.seed)
+
+        # WASDE intermediates, each stage feeding the next
+        wasde_data = self.wasde.clean_data(self.wasde.read_csv_paths(self.wasde_csv_paths))
+        wasde_data.to_parquet(self.wasde_path, index=False)
+        self.wasde.aggregate_wasde_data(self.wasde_path, self.wasde_aggregate_path)
+        self.wasde.filter_soybeans_wasde_data(self.wasde_aggregate_path, self.wasde_soybeans_path)
+        self.wasde.append_indicators(self.wasde_soybeans_path, self.indicators_path, self.model_input_path)
+
+        wasde_dates = pd.read_parquet(self.wasde_soybeans_path)
+        wasde_dates["Report Date"] = pd.to_datetime(wasde_dates["Report Date"])
+        self.wasde_dates = wasde_dates
+
+        years = list(range(self.trading_dates["Date"].dt.year.min(), self.trading_dates["Date"].dt.year.max() + 2))
+        for i in range(self.scale):
+            commodity_dir = os.path.join(self.work_dir, f"commodity_{i}")
+            raw_dir = os.path.join(commodity_dir, "raw")
+            os.makedirs(commodity_dir, exist_ok=True)
+            generate_contract_csvs(raw_dir, self.trading_dates, seed=self.seed + i)
+
+            processor = PriceProcessor(raw_dir, commodity_dir, commodity_dir, storage_format=self.storage_format, max_workers=1)
+            self.trading_dates.to_parquet(processor.trading_dates_path, index=False)
+            shutil.copy(self.wasde_soybeans_path, processor.wasde_data_path)
+            shutil.copy(self.model_input_path, processor.model_input_data_path)
+
+            contracts = processor.get_sorted_contract_names(os.listdir(raw_dir), years)
+            price_data = processor.process_raw_price_data(contracts, pd.DataFrame(self.trading_dates, columns=["Date"]))
+            processor.process_continuous_data(self.trading_dates, self.wasde_dates, price_data).to_parquet(
+                processor.continuous_price_path, index=False
+            )
+            self.commodities.append((processor, contracts, price_data))
+
+    def get_benchmarks(self):
+        def process_raw_price_data():
+            for processor, contracts, _ in self.commodities:
+                processor.process_raw_price_data(contracts, pd.DataFrame(self.trading_dates, columns=["Date"]))
+
+        def process_continuous_data():
+            for processor, _, price_data in self.commodities:
+                processor.process_continuous_data(self.trading_dates, self.wasde_dates, price_data)
+
+        def process_year_ahead_pricing_data():
+            for processor, _, price_data in self.commodities:
+                processor.process_year_ahead_pricing_data(self.trading_dates, self.wasde_dates, price_data)
+
+        def aggregate_model_input_data():
+            for processor, _, _ in self.commodities:
+                processor.aggregate_model_input_data()
+
+        def process_csv_by_path():
+            for path in self.wasde_csv_paths:
+                self.wasde.process_csv_by_path(path, pd.DataFrame())
+
+        output_path = os.path.join(self.interim_dir, "benchmark_output.parquet")
+        return {
+            "process_raw_price_data": process_raw_price_data,
+            "process_continuous_data": process_continuous_data,
+            "process_year_ahead_pricing_data": process_year_ahead_pricing_data,
+            "aggregate_model_input_data": aggregate_model_input_data,
+            "process_csv_by_path": process_csv_by_path,
+            "aggregate_wasde_data": lambda: self.wasde.aggregate_wasde_data(self.wasde_path, output_path),
+            "filter_soybeans_wasde_data": lambda: self.wasde.filter_soybeans_wasde_data(self.wasde_aggregate_path, output_path),
+            "append_indicators": lambda: self.wasde.append_indicators(self.wasde_soybeans_path, self.indicators_path, output_path),
+        }
+
+def measure(function, repeat=3):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+
+    # Separate run for memory, since tracing slows allocation-heavy code down
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": min(seconds),
+        "seconds_median": float(np.median(seconds)),
+        "peak_mb": peak / 2**20,
+    }
+
+def get_run_key(scale, years, storage_format):
+    return f"scale={scale},years={years},storage_format={storage_format}"
+
+def read_history(path):
+    if not os.path.exists(path):
+        return {"baseline": {}, "runs": []}
+    with open(path) as file:
+        return json.load(file)
+
+def write_history(path, history):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(history, file, indent=2)
+    os.replace(temporary_path, path)
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05):
+    comparison = []
+    for name, result in results.items():
+        base = baseline["results"].get(name) if baseline else None
+        if base is None or base["seconds"] == 0:
+            comparison.append((name, result["seconds"], None, None, False))
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        # Millisecond-scale stages are dominated by timer noise, so a slowdown must also exceed min_seconds
+        regressed = ratio > 1 + tolerance and result["seconds"] - base["seconds"] > min_seconds
+        comparison.append((name, result["seconds"], base["seconds"], ratio, regressed))
+    return comparison
+
+def run_suite(work_dir, scale, years, storage_format, repeat, names, log=print):
+    suite = BenchmarkSuite(work_dir, scale=scale, years=years, storage_format=storage_format)
+
+    start = time.perf_counter()
+    suite.setup()
+    log(f"scale {scale}x: generated data in {time.perf_counter() - start:.1f}s")
+
+    benchmarks = suite.get_benchmarks()
+    return {name: measure(benchmarks[name], repeat) for name in names}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the processors on synthetic data.")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1], help="commodity count multipliers, e.g. 1 10 100")
+    parser.add_argument("--years", type=int, default=25, help="history length in years (at most 99 for two-digit contract codes)")
+    parser.add_argument("--storage-format", choices=["json", "columnar"], default="json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--history", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "benchmarks", "history.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline for its configuration")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown over the baseline before failing")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--work-dir", default=None, help="keep generated data here instead of a temporary directory")
+    args = parser.parse_args(argv)
+
+    if not 0 < args.years < 100:
+        raise ValueError(f"Unsupported history length: {args.years}")
+
+    history = read_history(args.history)
+    regressions = []
+
+    for scale in args.scale:
+        work_dir = args.work_dir and os.path.join(args.work_dir, f"scale_{scale}")
+        with tempfile.TemporaryDirectory() as temporary_dir:
+            results = run_suite(work_dir or temporary_dir, scale, args.years, args.storage_format, args.repeat, args.only)
+
+        key = get_run_key(scale, args.years, args.storage_format)
+        run = {
+            "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "key": key,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "results": results,
+        }
+
+        print(f"{'benchmark':<34}{'seconds':>10}{'baseline':>10}{'ratio':>8}{'peak MB':>10}")
+        for name, seconds, base, ratio, regressed in compare(results, history["baseline"].get(key), args.tolerance, args.min_seconds):
+            base_text = f"{base:10.3f}" if base is not None else f"{'-':>10}"
+            ratio_text = f"{ratio:8.2f}" if ratio is not None else f"{'-':>8}"
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<34}{seconds:10.3f}{base_text}{ratio_text}{results[name]['peak_mb']:10.1f}{flag}")
+            if regressed:
+                regressions.append((key, name))
+
+        history["runs"].append(run)
+        if args.save_baseline or key not in history["baseline"]:
+            history["baseline"][key] = run
+
+    write_history(args.history, history)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
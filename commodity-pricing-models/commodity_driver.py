@@ -0,0 +1,98 @@
+import os
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from commodity_spec import COMMODITY_SPECS, get_commodity_spec
+from price_processor import PriceProcessor
+
+# Board crush per bushel of soybeans: 44 lb of meal (0.022 short tons) and 11 lb of oil
+CRUSH_MEAL_TONS = 0.022
+CRUSH_OIL_POUNDS = 11
+
+def build_commodity_series(commodity, raw_data_dir, interim_data_dir, processed_data_dir, storage_format="json"):
+    start = time.perf_counter()
+    spec = get_commodity_spec(commodity)
+
+    # Contract CSVs are read sequentially here; the parallelism is across commodities
+    processor = PriceProcessor(
+        spec.get_price_dir(raw_data_dir),
+        interim_data_dir,
+        processed_data_dir,
+        storage_format=storage_format,
+        max_workers=1,
+        commodity=spec,
+        contract_cache_dir=os.path.join(interim_data_dir, "contract_cache"),
+    )
+    processor.aggregate_price_data()
+    processor.generate_continuous_price_data()
+    return spec.name, time.perf_counter() - start
+
+class CommodityDriver:
+    def __init__(
+        self,
+        raw_data_dir,
+        interim_data_dir,
+        processed_data_dir,
+        commodities=None,
+        storage_format="json",
+        max_workers=None,
+    ):
+        self.raw_data_dir = raw_data_dir
+        self.interim_data_dir = interim_data_dir
+        self.processed_data_dir = processed_data_dir
+        self.commodities = [get_commodity_spec(commodity) for commodity in (commodities or COMMODITY_SPECS)]
+        self.storage_format = storage_format
+        self.max_workers = max_workers
+        self.run_report = None
+
+    def get_available_commodities(self):
+        return [spec for spec in self.commodities if os.path.isdir(spec.get_price_dir(self.raw_data_dir))]
+
+    def run(self):
+        specs = self.get_available_commodities()
+        args = [(spec, self.raw_data_dir, self.interim_data_dir, self.processed_data_dir, self.storage_format) for spec in specs]
+
+        if self.max_workers == 1 or len(specs) <= 1:
+            results = [build_commodity_series(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(build_commodity_series, *zip(*args)))
+
+        self.run_report = pd.DataFrame(results, columns=["Commodity", "Seconds"])
+        return self.run_report
+
+    def read_continuous_data(self, series="continuous"):
+        continuous_data = {}
+        for spec in self.get_available_commodities():
+            path = spec.get_interim_path(self.interim_data_dir, series)
+            if os.path.exists(path):
+                continuous_data[spec.name] = pd.read_parquet(path)
+        return continuous_data
+
+    def get_price_panel(self, column="Average"):
+        # Date x commodity frame of the front-contract price
+        continuous_data = self.read_continuous_data()
+        if not continuous_data:
+            return pd.DataFrame()
+
+        panel = pd.concat(
+            {name: data.set_index("Date")[column] for name, data in continuous_data.items()}, axis=1
+        )
+        return panel.sort_index()
+
+    def get_cross_commodity_features(self, column="Average"):
+        panel = self.get_price_panel(column)
+        features = pd.DataFrame(index=panel.index)
+
+        if {"soybeans", "corn"} <= set(panel.columns):
+            features["Soybean/Corn Ratio"] = panel["soybeans"] / panel["corn"]
+
+        if {"soybeans", "soybean_meal", "soybean_oil"} <= set(panel.columns):
+            # Meal is quoted in USD/short ton, oil in cents/lb and soybeans in cents/bu; the spread is in cents/bu
+            features["Crush Spread"] = (
+                panel["soybean_meal"] * CRUSH_MEAL_TONS * 100
+                + panel["soybean_oil"] * CRUSH_OIL_POUNDS
+                - panel["soybeans"]
+            )
+        return features.reset_index()
@@ -0,0 +1,53 @@
+import os
+
+MONTH_CODES = {"F": 1, "G": 2, "H": 3, "J": 4, "K": 5, "M": 6, "N": 7, "Q": 8, "U": 9, "V": 10, "X": 11, "Z": 12}
+
+def get_roll_table(contract_sequence):
+    # After each month's WASDE release, hold the first contract delivering strictly after that month
+    months = [MONTH_CODES[symbol[-1]] for symbol in contract_sequence]
+
+    roll_table = []
+    for month in range(1, 13):
+        later = [i for i, contract_month in enumerate(months) if contract_month > month]
+        if later:
+            roll_table.append((contract_sequence[later[0]], 0))
+        else:
+            roll_table.append((contract_sequence[0], 1))
+    return roll_table
+
+class CommoditySpec:
+    def __init__(self, name, root, month_codes, wasde_commodity=None, price_unit=None, roll_table=None):
+        self.name = name
+        self.root = root
+        self.month_codes = month_codes
+        self.wasde_commodity = wasde_commodity
+        self.price_unit = price_unit
+
+        # Contract files are named {root}{month code}{two-digit year}.csv, e.g. SX24.csv
+        self.contract_sequence = [f"{root}{code}" for code in month_codes]
+        self.roll_table = roll_table or get_roll_table(self.contract_sequence)
+
+    def __repr__(self):
+        return f"CommoditySpec({self.name!r})"
+
+    def get_price_dir(self, raw_data_dir):
+        return os.path.join(raw_data_dir, "historical_prices", self.name)
+
+    def get_interim_path(self, interim_data_dir, series, extension=".parquet"):
+        # Outputs are partitioned per commodity by file name, e.g. prices_corn_continuous.parquet
+        return os.path.join(interim_data_dir, f"prices_{self.name}_{series}{extension}")
+
+COMMODITY_SPECS = {
+    "soybeans": CommoditySpec("soybeans", "S", "FHKNQUX", "Soybeans", "cents/bu"),
+    "corn": CommoditySpec("corn", "ZC", "HKNUZ", "Corn", "cents/bu"),
+    "wheat": CommoditySpec("wheat", "ZW", "HKNUZ", "Wheat", "cents/bu"),
+    "soybean_meal": CommoditySpec("soybean_meal", "ZM", "FHKNQUVZ", "Soybean Meal", "USD/short ton"),
+    "soybean_oil": CommoditySpec("soybean_oil", "ZL", "FHKNQUVZ", "Soybean Oil", "cents/lb"),
+}
+
+def get_commodity_spec(commodity):
+    if isinstance(commodity, CommoditySpec):
+        return commodity
+    if commodity not in COMMODITY_SPECS:
+        raise ValueError(f"Unknown commodity: {commodity}")
+    return COMMODITY_SPECS[commodity]
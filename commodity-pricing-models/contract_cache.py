@@ -0,0 +1,60 @@
+import os
+import hashlib
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from manifest import get_file_entry, is_file_changed
+
+class ContractCache:
+    # One Feather file per parsed contract CSV. The source's size, mtime and content hash and the
+    # parser version are stored in the file's schema metadata, so each entry validates itself and
+    # processes sharing a cache directory never contend for a common index file
+    def __init__(self, cache_dir, version=""):
+        self.cache_dir = cache_dir
+        self.version = str(version)
+
+    def get_cache_path(self, path):
+        # SX24.csv -> SX24.<source path hash>.feather; the path hash keeps same-named files from
+        # different directories apart
+        source = os.path.abspath(path)
+        name = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.cache_dir, f"{name}.{hashlib.sha1(source.encode()).hexdigest()[:12]}.feather")
+
+    def get_metadata(self, path):
+        cache_path = self.get_cache_path(path)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with pa.memory_map(cache_path) as source:
+                metadata = pa.ipc.open_file(source).schema.metadata or {}
+        except (pa.ArrowInvalid, OSError):
+            return None
+        return {key.decode(): value.decode() for key, value in metadata.items()}
+
+    def is_valid(self, path):
+        # Frames written by another parser version are stale even if the source is unchanged
+        metadata = self.get_metadata(path)
+        if metadata is None or metadata.get("source") != os.path.abspath(path) or metadata.get("version") != self.version:
+            return False
+
+        entry = {"size": int(metadata["size"]), "mtime": int(metadata["mtime"]), "sha256": metadata["sha256"]}
+        return not is_file_changed(path, entry)
+
+    def read(self, path):
+        return feather.read_table(self.get_cache_path(path), memory_map=True).to_pandas()
+
+    def write(self, path, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = get_file_entry(path)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"source": os.path.abspath(path).encode(),
+            b"version": self.version.encode(),
+            **{key.encode(): str(value).encode() for key, value in entry.items()},
+        })
+
+        cache_path = self.get_cache_path(path)
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        feather.write_feather(table, temporary_path, compression="zstd")
+        os.replace(temporary_path, cache_path)
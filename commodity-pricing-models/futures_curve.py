@@ -0,0 +1,125 @@
+import os
+import numpy as np
+import pandas as pd
+
+from commodity_spec import MONTH_CODES
+
+def get_expiries(contract_sequence, symbols, years):
+    # Grain contracts stop trading on the business day before the 15th of the delivery month
+    months = np.array([MONTH_CODES[symbol[-1]] for symbol in contract_sequence])[symbols]
+    fifteenth = (
+        (np.asarray(years) - 1970) * 12 + months - 1
+    ).astype("datetime64[M]").astype("datetime64[D]") + np.timedelta64(14, "D")
+    return np.busday_offset(fifteenth, -1, roll="forward").astype("datetime64[ns]")
+
+class FuturesCurve:
+    fields = ["High", "Low", "Average"]
+
+    def __init__(self, dates, contracts, expiries, values=None):
+        # dates: (dates,), contracts and expiries: (dates x tenors), values: (fields x dates x tenors)
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.contracts = np.asarray(contracts)
+        self.expiries = np.asarray(expiries, dtype="datetime64[ns]")
+
+        if values is None:
+            values = np.full((len(self.fields),) + self.contracts.shape, np.nan)
+        self.values = values
+
+    @property
+    def tenors(self):
+        return self.contracts.shape[1]
+
+    def __len__(self):
+        return len(self.dates)
+
+    def field(self, field="Average"):
+        # (dates x tenors) view, no copy
+        return self.values[self.fields.index(field)]
+
+    def slice(self, start=None, end=None):
+        # Dates in [start, end]; arrays are views, so memory-mapped curves stay on disk
+        first = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "ns")) if start is not None else 0
+        last = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "ns"), side="right") if end is not None else len(self.dates)
+        return FuturesCurve(self.dates[first:last], self.contracts[first:last], self.expiries[first:last], self.values[:, first:last])
+
+    def get_days_to_expiry(self):
+        return (self.expiries - self.dates[:, None]) / np.timedelta64(1, "D")
+
+    def calendar_spread(self, near=0, far=1, field="Average"):
+        prices = self.field(field)
+        return prices[:, near] - prices[:, far]
+
+    def roll_yield(self, near=0, far=1, field="Average"):
+        # Annualized log carry between two tenors; positive in backwardation
+        prices = self.field(field)
+        days = (self.expiries[:, far] - self.expiries[:, near]) / np.timedelta64(1, "D")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.log(prices[:, near] / prices[:, far]) * 365 / days
+
+    def slope(self, field="Average"):
+        # Least-squares slope of log price per year to expiry, over the tenors priced on each date
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_prices = np.log(self.field(field))
+        years = self.get_days_to_expiry() / 365
+        valid = ~np.isnan(log_prices)
+        counts = valid.sum(axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_years = np.where(valid, years, 0).sum(axis=1) / counts
+            mean_prices = np.where(valid, log_prices, 0).sum(axis=1) / counts
+            x = np.where(valid, years - mean_years[:, None], 0)
+            y = np.where(valid, log_prices - mean_prices[:, None], 0)
+            slope = (x * y).sum(axis=1) / (x * x).sum(axis=1)
+        return np.where(counts >= 2, slope, np.nan)
+
+    def curvature(self, near=0, middle=None, far=-1, field="Average"):
+        # Butterfly of the near, middle and far tenors relative to the middle price
+        prices = self.field(field)
+        middle = self.tenors // 2 if middle is None else middle
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (prices[:, near] - 2 * prices[:, middle] + prices[:, far]) / prices[:, middle]
+
+    def constant_maturity(self, days=(30, 90, 180, 365), field="Average"):
+        # Linear interpolation in days to expiry; points outside the listed tenors are NaN
+        prices = self.field(field)
+        days_to_expiry = self.get_days_to_expiry()
+        rows = np.arange(len(self.dates))
+
+        points = np.full((len(self.dates), len(days)), np.nan)
+        for i, target in enumerate(days):
+            upper = (days_to_expiry < target).sum(axis=1)
+            inside = (upper > 0) & (upper < self.tenors)
+            upper = np.clip(upper, 1, self.tenors - 1)
+            lower = upper - 1
+
+            lower_days, upper_days = days_to_expiry[rows, lower], days_to_expiry[rows, upper]
+            weight = (target - lower_days) / (upper_days - lower_days)
+            interpolated = prices[rows, lower] * (1 - weight) + prices[rows, upper] * weight
+            points[:, i] = np.where(inside, interpolated, np.nan)
+        return points
+
+    def to_wide(self, field="Average"):
+        return pd.DataFrame(self.field(field), index=pd.DatetimeIndex(self.dates, name="Date"), columns=range(self.tenors))
+
+    def to_frame(self):
+        # Long layout (Date, Contract, High, Low, Average) of the priced cells, as in the continuous_ext table
+        date_index, tenor_index = np.nonzero(~np.isnan(self.values).any(axis=0))
+        frame = pd.DataFrame({
+            "Date": self.dates[date_index],
+            "Contract": self.contracts[date_index, tenor_index].astype(object),
+        })
+        for i, field in enumerate(self.fields):
+            frame[field] = self.values[i, date_index, tenor_index]
+        return frame
+
+    def save(self, path):
+        # One .npy per array so each can be memory-mapped on load
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "dates.npy"), self.dates)
+        np.save(os.path.join(path, "contracts.npy"), self.contracts.astype(str))
+        np.save(os.path.join(path, "expiries.npy"), self.expiries)
+        np.save(os.path.join(path, "values.npy"), self.values)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        return cls(*[np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ["dates", "contracts", "expiries", "values"]])
@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import queue
+import argparse
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from model_training import MODEL_PARAMETERS, MODEL_TARGETS
+
+def find_latest_model(model_dir, pattern="soybeans_model_v*.pkl"):
+    # soybeans_model_v10.pkl sorts after soybeans_model_v9.pkl
+    def get_version(path):
+        match = re.search(r"_v(\d+)\.pkl$", path)
+        return int(match.group(1)) if match else -1
+
+    paths = glob.glob(os.path.join(model_dir, pattern))
+    if not paths:
+        raise FileNotFoundError(f"No model matching {pattern} in {model_dir}")
+    return max(paths, key=get_version)
+
+class LatencyStats:
+    def __init__(self, max_samples=100_000):
+        self.max_samples = max_samples
+        self.latencies = []
+        self.rows = 0
+        self.first_start = None
+        self.last_end = None
+        self.lock = threading.Lock()
+
+    def record(self, seconds, rows):
+        with self.lock:
+            self.latencies.append(seconds)
+            if len(self.latencies) > self.max_samples:
+                del self.latencies[: len(self.latencies) - self.max_samples]
+            self.rows += rows
+            # Throughput is over wall time, so overlapping concurrent calls are not double counted
+            end = time.perf_counter()
+            if self.first_start is None:
+                self.first_start = end - seconds
+            self.last_end = end
+
+    def summary(self):
+        with self.lock:
+            latencies = np.array(self.latencies)
+            rows = self.rows
+            wall_seconds = self.last_end - self.first_start if self.first_start is not None else 0.0
+
+        if not len(latencies):
+            return {"calls": 0, "rows": 0}
+        return {
+            "calls": len(latencies),
+            "rows": rows,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000),
+            "rows_per_second": rows / wall_seconds if wall_seconds else None,
+        }
+
+class PriceModel:
+    def __init__(self, model_path, parameters=MODEL_PARAMETERS, targets=MODEL_TARGETS, n_jobs=None):
+        self.model_path = model_path
+        self.parameters = list(parameters)
+        self.targets = list(targets)
+        self.model = joblib.load(model_path)
+        self.stats = LatencyStats()
+
+        # Trees are scored in parallel for large batches
+        if n_jobs is not None:
+            self.model.set_params(regressor__n_jobs=n_jobs)
+
+        # First call pays for lazy allocations; keep that out of request latencies
+        self.model.predict(self.prepare(np.zeros((1, len(self.parameters)))))
+
+    def prepare(self, scenarios):
+        # Accepts a DataFrame, a dict of columns, a list of row dicts or a 2D array already in
+        # parameter order; returns a float frame with the columns the model was trained on
+        if isinstance(scenarios, pd.DataFrame):
+            frame = scenarios
+        elif isinstance(scenarios, dict):
+            frame = pd.DataFrame(scenarios)
+        elif len(scenarios) and isinstance(scenarios[0], dict):
+            frame = pd.DataFrame.from_records(scenarios)
+        else:
+            values = np.asarray(scenarios, dtype=np.float64)
+            if values.ndim == 1:
+                values = values.reshape(1, -1)
+            if values.ndim != 2 or values.shape[1] != len(self.parameters):
+                raise ValueError(f"Expected {len(self.parameters)} features per scenario, got shape {values.shape}")
+            frame = pd.DataFrame(values, columns=self.parameters)
+
+        missing = [column for column in self.parameters if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing model parameters: {missing}")
+
+        frame = frame[self.parameters].astype(np.float64)
+        if frame.isna().to_numpy().any():
+            raise ValueError("Scenarios contain missing values")
+        return frame
+
+    def predict(self, scenarios):
+        start = time.perf_counter()
+        frame = self.prepare(scenarios)
+        prediction = self.model.predict(frame)
+        self.stats.record(time.perf_counter() - start, len(frame))
+        return pd.DataFrame(prediction, columns=self.targets, index=frame.index)
+
+    def predict_prices(self, input):
+        # Single-scenario helper matching the notebook: (high, low, average)
+        high_price, low_price, avg_price = self.predict([input]).iloc[0]
+        return high_price, low_price, avg_price
+
+class MicroBatcher:
+    def __init__(self, model, max_batch_rows=200_000, max_wait_ms=2.0):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.stats = LatencyStats()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, scenarios):
+        # Validation happens on the caller's thread so a bad request cannot fail the whole batch
+        future = Future()
+        self.requests.put((self.model.prepare(scenarios), future, time.perf_counter()))
+        return future
+
+    def predict(self, scenarios):
+        return self.submit(scenarios).result()
+
+    def get_batch(self):
+        batch = [self.requests.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_rows:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.get_batch()
+            frames = [frame for frame, _, _ in batch]
+            try:
+                prediction = self.model.predict(pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0])
+            except Exception as error:
+                for _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+
+            offset = 0
+            for frame, future, submitted in batch:
+                result = prediction.iloc[offset : offset + len(frame)]
+                result.index = frame.index
+                offset += len(frame)
+                future.set_result(result)
+                self.stats.record(time.perf_counter() - submitted, len(frame))
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, {"requests": self.batcher.stats.summary(), "model": self.batcher.model.stats.summary()})
+        elif self.path == "/health":
+            self.send_json(200, {"model": os.path.basename(self.batcher.model.model_path)})
+        else:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            # {"scenarios": [{...}, ...]} or {"scenarios": {"STU, US": [...], ...}}
+            scenarios = payload["scenarios"] if isinstance(payload, dict) and "scenarios" in payload else payload
+            future = self.batcher.submit(scenarios)
+        except (ValueError, KeyError, TypeError) as error:
+            self.send_json(400, {"error": str(error)})
+            return
+
+        try:
+            prediction = future.result()
+        except Exception as error:
+            # The batched model call failed; every request in the batch gets the error
+            self.send_json(500, {"error": f"{type(error).__name__}: {error}"})
+            return
+        self.send_json(200, {column: prediction[column].tolist() for column in prediction.columns})
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(model_path, host="127.0.0.1", port=8765, max_batch_rows=200_000, max_wait_ms=2.0, n_jobs=None):
+    model = PriceModel(model_path, n_jobs=n_jobs)
+    handler = type("BoundInferenceHandler", (InferenceHandler,), {"batcher": MicroBatcher(model, max_batch_rows, max_wait_ms)})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve soybean price predictions over HTTP.")
+    parser.add_argument("--model", help="model file; defaults to the latest soybeans_model_v*.pkl in --model-dir")
+    parser.add_argument("--model-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "models"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch-rows", type=int, default=200_000)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--n-jobs", type=int, default=None, help="threads used to score the forest")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or find_latest_model(args.model_dir)
+    server = serve(model_path, args.host, args.port, args.max_batch_rows, args.max_wait_ms, args.n_jobs)
+    print(f"Serving {model_path} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import time
+import logging
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def get_peak_rss_mb():
+    # Process high-water mark; ru_maxrss is KiB on Linux and bytes on macOS
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+class StageMetrics:
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def read(self, path=None, rows=None):
+        if path is not None and os.path.isfile(path):
+            self.bytes_read += os.path.getsize(path)
+        if rows is not None:
+            self.rows_in += int(rows)
+
+    def write(self, path=None, rows=None):
+        if path is not None and os.path.isfile(path):
+            self.bytes_written += os.path.getsize(path)
+        if rows is not None:
+            self.rows_out += int(rows)
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self.path = path
+        self.__lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self.__lock, open(self.path, "a") as file:
+            file.write(line + "\n")
+
+class LoggingSink:
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("instrumentation")
+        self.level = level
+
+    def write(self, record):
+        self.logger.log(
+            self.level,
+            "%s: %.3fs wall, %.3fs cpu, %s rows in, %s rows out, %s bytes read, %s bytes written",
+            record["stage"], record["wall_seconds"], record["cpu_seconds"],
+            record["rows_in"], record["rows_out"], record["bytes_read"], record["bytes_written"],
+        )
+
+class MemorySink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def get_records(self, stage):
+        return [record for record in self.records if record["stage"] == stage]
+
+class NullInstrumentation:
+    # Disabled instrumentation: instrumented methods check `enabled` and call straight through
+    enabled = False
+
+    @contextmanager
+    def stage(self, name, **context):
+        yield StageMetrics(name)
+
+    def read(self, path=None, rows=None):
+        pass
+
+    def write(self, path=None, rows=None):
+        pass
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+class Instrumentation:
+    enabled = True
+
+    def __init__(self, sinks=None, profile_stages=(), profile_dir=None):
+        self.sinks = list(sinks or [])
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        self.__local = threading.local()
+
+    def get_stack(self):
+        if not hasattr(self.__local, "stack"):
+            self.__local.stack = []
+        return self.__local.stack
+
+    @contextmanager
+    def stage(self, name, **context):
+        stack = self.get_stack()
+        metrics = StageMetrics(name, parent=stack[-1].name if stack else None)
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+
+        started = time.time()
+        wall_start = time.perf_counter()
+        # Process-wide CPU time, so stages running concurrently overlap
+        cpu_start = time.process_time()
+        peak_rss_start = get_peak_rss_mb()
+        stack.append(metrics)
+        status = "ok"
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            yield metrics
+        except BaseException as error:
+            status = f"error: {type(error).__name__}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            stack.pop()
+
+            # ru_maxrss is the process's lifetime peak, not this stage's; the increase is how far
+            # the stage (or anything running alongside it) raised that peak
+            process_peak_rss = get_peak_rss_mb()
+            record = {
+                "stage": name,
+                "parent": metrics.parent,
+                "started": started,
+                "wall_seconds": time.perf_counter() - wall_start,
+                "cpu_seconds": time.process_time() - cpu_start,
+                "process_peak_rss_mb": process_peak_rss,
+                "peak_rss_increase_mb": process_peak_rss - peak_rss_start if process_peak_rss is not None else None,
+                "rows_in": metrics.rows_in,
+                "rows_out": metrics.rows_out,
+                "bytes_read": metrics.bytes_read,
+                "bytes_written": metrics.bytes_written,
+                "status": status,
+                **context,
+            }
+            if profiler is not None:
+                record["profile"] = self.save_profile(name, started, profiler)
+            self.emit(record)
+
+    def save_profile(self, name, started, profiler):
+        profile_dir = self.profile_dir or os.getcwd()
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{name}-{int(started)}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def read(self, path=None, rows=None):
+        stack = self.get_stack()
+        if stack:
+            stack[-1].read(path, rows)
+
+    def write(self, path=None, rows=None):
+        stack = self.get_stack()
+        if stack:
+            stack[-1].write(path, rows)
+
+    def emit(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+
+def instrumented(method):
+    # Records the decorated processor method as a stage of self.instrumentation
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.instrumentation.enabled:
+            return method(self, *args, **kwargs)
+        with self.instrumentation.stage(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
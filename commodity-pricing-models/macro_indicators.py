@@ -0,0 +1,170 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import NULL_INSTRUMENTATION, instrumented
+from price_processor import read_contract_csv
+
+# (indicator column, Barchart daily export) in the order of the original indicator table
+MARKET_SERIES = [
+    ("Gold", "GCY00.csv"),
+    ("DX", "DXY00.csv"),
+    ("Crude", "QAY00.csv"),
+    ("USD?BRL", "USD:BRL.csv"),
+]
+
+GDP_WORKBOOK = "macroeconomic_inidicators.xlsm"
+GDP_SHEET = "GDP"
+GDP_COLUMN = "GDP (Bn USD)"
+
+FAOSTAT_FILE = "FAOSTAT_data_en_8-8-2024.csv"
+PRODUCER_PRICE_ITEMS = {"Soya beans": "Soybeans", "Maize (corn)": "Corn", "Wheat": "Wheat"}
+PRODUCER_PRICE_AREAS = {"United States of America": "US", "Brazil": "BR"}
+
+RESAMPLE_METHODS = ("month_average", "month_end", "as_of_release")
+
+def read_market_series(path, field="Open"):
+    market_data, _ = read_contract_csv(path)
+    market_data = market_data[["Date", field]].dropna()
+    return market_data.sort_values("Date", kind="stable").reset_index(drop=True)
+
+def resample_series(dates, values, method="month_average", frequency="M", release_dates=None, drop_incomplete=True):
+    # Vectorized over one daily series: period averages and period closes group on integer period
+    # codes; as-of-release takes the last observation on or before each release date
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    values = np.asarray(values, dtype=np.float64)
+
+    if method == "as_of_release":
+        release_dates = pd.to_datetime(pd.Series(release_dates)).to_numpy(dtype="datetime64[ns]")
+        positions = np.searchsorted(dates, release_dates, side="right") - 1
+        resampled = np.where(positions >= 0, values[np.clip(positions, 0, None)], np.nan) if len(values) else np.full(len(release_dates), np.nan)
+        return pd.Series(resampled, index=pd.DatetimeIndex(release_dates))
+
+    periods = pd.PeriodIndex(pd.DatetimeIndex(dates), freq=frequency)
+    codes, unique_periods = pd.factorize(periods, sort=True)
+    if method == "month_average":
+        resampled = np.bincount(codes, weights=values, minlength=len(unique_periods)) / np.bincount(codes, minlength=len(unique_periods))
+    else:
+        # Dates are sorted, so the last row of each period is where the next period starts, minus one
+        last_rows = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True])
+        resampled = values[last_rows]
+    resampled = pd.Series(resampled, index=unique_periods.to_timestamp())
+
+    if drop_incomplete and len(unique_periods):
+        # A last period the data stops partway through (before its last business day) would
+        # otherwise be averaged or closed as if complete
+        last_business_day = np.busday_offset(unique_periods[-1].end_time.to_datetime64().astype("datetime64[D]"), 0, roll="backward")
+        if dates[-1] < last_business_day:
+            resampled = resampled.iloc[:-1]
+    return resampled
+
+class MacroIndicatorBuilder:
+    def __init__(self, input_dir, max_workers=None, field="Open", instrumentation=None):
+        self.input_dir = input_dir
+        self.max_workers = max_workers
+        self.field = field
+        self.market_series = MARKET_SERIES
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+
+    def get_market_paths(self):
+        return [os.path.join(self.input_dir, file_name) for _, file_name in self.market_series]
+
+    @instrumented
+    def read_market_data(self):
+        paths = self.get_market_paths()
+        fields = [self.field] * len(paths)
+        if self.max_workers == 1:
+            results = [read_market_series(path, field) for path, field in zip(paths, fields)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers or len(paths)) as executor:
+                results = list(executor.map(read_market_series, paths, fields))
+
+        for path, market_data in zip(paths, results):
+            self.instrumentation.read(path, rows=len(market_data))
+        return {column: market_data for (column, _), market_data in zip(self.market_series, results)}
+
+    def read_gdp(self, frequency="M"):
+        # Quarterly GDP has no raw daily file; it is kept on the workbook's GDP sheet
+        path = os.path.join(self.input_dir, GDP_WORKBOOK)
+        gdp = pd.read_excel(path, sheet_name=GDP_SHEET)
+        self.instrumentation.read(path, rows=len(gdp))
+
+        gdp["Date"] = pd.PeriodIndex(pd.to_datetime(gdp["Date"].astype(str)), freq=frequency).to_timestamp()
+        return gdp.groupby("Date")[gdp.columns[1]].last().rename(GDP_COLUMN)
+
+    def read_producer_prices(self, publication_lag_years=2):
+        # Annual FAOSTAT producer prices (USD/tonne). A year's value is only used from January of
+        # year + publication_lag_years, since FAOSTAT publishes well after the year closes
+        path = os.path.join(self.input_dir, FAOSTAT_FILE)
+        producer_prices = pd.read_csv(
+            path, encoding="utf-8-sig", usecols=["Area", "Item", "Year", "Value"], dtype={"Year": "int64", "Value": "float64"}
+        )
+        self.instrumentation.read(path, rows=len(producer_prices))
+
+        producer_prices = producer_prices[
+            producer_prices["Item"].isin(PRODUCER_PRICE_ITEMS) & producer_prices["Area"].isin(PRODUCER_PRICE_AREAS)
+        ]
+        producer_prices = producer_prices.assign(
+            Column="Producer Price, "
+            + producer_prices["Item"].map(PRODUCER_PRICE_ITEMS)
+            + ", "
+            + producer_prices["Area"].map(PRODUCER_PRICE_AREAS),
+            Date=pd.to_datetime((producer_prices["Year"] + publication_lag_years).astype(str) + "-01-01"),
+        )
+        return producer_prices.pivot_table(index="Date", columns="Column", values="Value", aggfunc="last")
+
+    @instrumented
+    def build(
+        self,
+        method="month_average",
+        frequency="M",
+        release_dates=None,
+        include_gdp=True,
+        include_producer_prices=False,
+        fill_gaps=True,
+        drop_incomplete=True,
+    ):
+        if method not in RESAMPLE_METHODS:
+            raise ValueError(f"Unknown resample method: {method}")
+        if method == "as_of_release" and release_dates is None:
+            raise ValueError("release_dates are required for as_of_release")
+
+        market_data = self.read_market_data()
+        indicators = pd.concat(
+            {
+                column: resample_series(data["Date"], data[self.field], method, frequency, release_dates, drop_incomplete)
+                for column, data in market_data.items()
+            },
+            axis=1,
+        ).sort_index()
+        if fill_gaps:
+            # Periods with no trades inside a series' history carry its last value; nothing is
+            # filled before a series starts or after it ends
+            indicators = indicators.ffill(limit_area="inside")
+
+        # Slower series are carried forward onto the market-data dates they were known at
+        slow_series = []
+        if include_gdp:
+            slow_series.append(self.read_gdp(frequency).to_frame())
+        if include_producer_prices:
+            slow_series.append(self.read_producer_prices())
+        for series in slow_series:
+            series = series.sort_index()
+            positions = np.searchsorted(series.index.to_numpy(), indicators.index.to_numpy(), side="right") - 1
+            for column in series.columns:
+                values = series[column].to_numpy(dtype=np.float64)
+                indicators[column] = np.where(positions >= 0, values[np.clip(positions, 0, None)], np.nan)
+
+        columns = [GDP_COLUMN] if include_gdp else []
+        columns += [column for column, _ in self.market_series]
+        columns += [column for column in indicators.columns if column not in columns]
+        indicators = indicators[columns].rename_axis("Date").reset_index()
+        self.instrumentation.write(rows=len(indicators))
+        return indicators
+
+    def build_to_parquet(self, output_path, **kwargs):
+        indicators = self.build(**kwargs)
+        indicators.to_parquet(output_path, index=False)
+        self.instrumentation.write(output_path)
+        return indicators
@@ -0,0 +1,89 @@
+import os
+import json
+import hashlib
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_file_entry(path, digest=file_digest):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest(path)}
+
+def is_file_changed(path, entry, digest=file_digest):
+    # entry is the size, mtime and sha256 recorded for path, or None if it was never recorded
+    if entry is None:
+        return True
+
+    stat = os.stat(path)
+    if entry["size"] != stat.st_size:
+        return True
+    if entry["mtime"] == stat.st_mtime_ns:
+        return False
+
+    # Touched but not edited files (e.g. re-downloaded) keep their content hash
+    return entry["sha256"] != digest(path)
+
+def manifest_path(output_path):
+    # The manifest sits next to the output it describes, e.g. wasde.parquet -> wasde.manifest.json
+    return os.path.splitext(str(output_path))[0] + ".manifest.json"
+
+class FileManifest:
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.entries = {}
+        self.__digests = {}
+
+        if os.path.exists(path):
+            with open(path) as file:
+                self.entries = json.load(file)["files"]
+
+    def key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def digest(self, path):
+        stat = os.stat(path)
+        key = (self.key(path), stat.st_size, stat.st_mtime_ns)
+        if key not in self.__digests:
+            self.__digests[key] = file_digest(path)
+        return self.__digests[key]
+
+    def get_digest(self, path):
+        # Recorded hash while size and mtime are unchanged, otherwise hash the file
+        entry = self.entries.get(self.key(path))
+        stat = os.stat(path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return entry["sha256"]
+        return self.digest(path)
+
+    def is_changed(self, path):
+        return is_file_changed(path, self.entries.get(self.key(path)), self.digest)
+
+    def changed(self, paths):
+        return [path for path in paths if self.is_changed(path)]
+
+    def removed(self, paths):
+        keys = {self.key(path) for path in paths}
+        return [key for key in self.entries if key not in keys]
+
+    def update(self, paths):
+        entries = {}
+        for path in paths:
+            key = self.key(path)
+            stat = os.stat(path)
+            entry = self.entries.get(key)
+
+            if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+                entry = get_file_entry(path, self.digest)
+            entries[key] = entry
+        self.entries = entries
+
+    def save(self):
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"files": self.entries}, file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+MODEL_PARAMETERS = ["STU, US", "STU, AR", "STU, BR", "STU, Corn", "Gold", "DX", "Crude", "GDP (Bn USD)"]
+MODEL_TARGETS = ["Price_High", "Price_Low", "Price_Average"]
+
+# The grid searched in soybean_pricing_model.ipynb
+PARAM_GRID = {
+    "regressor__n_estimators": [100, 200, 300, 500],
+    "regressor__max_depth": [None, 10, 20, 30, 40],
+    "regressor__min_samples_split": [2, 5, 10],
+    "regressor__min_samples_leaf": [1, 2, 4],
+    "regressor__max_features": [None, "sqrt", "log2"],
+    "regressor__bootstrap": [True, False],
+}
+
+SEARCH_MODES = ("grid", "random", "halving")
+
+def build_model(random_state=42):
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("regressor", RandomForestRegressor(random_state=random_state)),
+    ])
+
+def fit_fold(model, params, X, y, train_index, test_index, deadline=None):
+    # deadline is wall-clock (time.time()) so worker processes can compare against it; a fit
+    # that would start after it is skipped
+    if deadline is not None and time.time() > deadline:
+        return None
+    model = clone(model).set_params(**params)
+    model.fit(X.iloc[train_index], y.iloc[train_index])
+    return mean_squared_error(y.iloc[test_index], model.predict(X.iloc[test_index]))
+
+def hash_frame(data):
+    return hashlib.sha256(pd.util.hash_pandas_object(data, index=False).values.tobytes()).hexdigest()
+
+class ModelTrainer:
+    def __init__(
+        self,
+        data,
+        parameters=MODEL_PARAMETERS,
+        targets=MODEL_TARGETS,
+        date_column="Date",
+        n_splits=5,
+        test_size=0.2,
+        cache_dir=None,
+        random_state=42,
+        n_jobs=-1,
+    ):
+        self.parameters = list(parameters)
+        self.targets = list(targets)
+        self.n_splits = n_splits
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.model = build_model(random_state)
+
+        # Time-ordered split: the most recent releases are held out, nothing is shuffled
+        if date_column not in data.columns and "Report Date" in data.columns:
+            date_column = "Report Date"
+        data = data.sort_values(date_column, kind="stable") if date_column in data.columns else data
+        combined_data = data[self.parameters + self.targets].dropna().reset_index(drop=True)
+
+        n_test = int(math.ceil(len(combined_data) * test_size))
+        self.train_data = combined_data.iloc[: len(combined_data) - n_test].reset_index(drop=True)
+        self.test_data = combined_data.iloc[len(combined_data) - n_test :].reset_index(drop=True)
+        self.X_train, self.y_train = self.train_data[self.parameters], self.train_data[self.targets]
+        self.X_test, self.y_test = self.test_data[self.parameters], self.test_data[self.targets]
+
+        self.splits = list(TimeSeriesSplit(n_splits=n_splits).split(self.X_train))
+        self.data_hash = hash_frame(self.train_data)
+
+        self.cache_dir = cache_dir
+        self.cache = {}
+        if cache_dir is not None and os.path.exists(self.get_cache_path()):
+            with open(self.get_cache_path()) as file:
+                self.cache = json.load(file)
+
+        self.results = []
+        self.report = None
+
+    def get_cache_path(self):
+        return os.path.join(self.cache_dir, "cv_scores.json")
+
+    def save_cache(self):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary_path = f"{self.get_cache_path()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.cache, file)
+        os.replace(temporary_path, self.get_cache_path())
+
+    def get_fold_key(self, params, fold):
+        key = json.dumps(
+            {"data": self.data_hash, "params": params, "fold": fold, "splits": self.n_splits, "seed": self.random_state},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def evaluate(self, candidates, deadline=None):
+        # Mean CV MSE per candidate; cached folds are reused and the rest are fitted in parallel
+        jobs = []
+        for params in candidates:
+            for fold in range(self.n_splits):
+                key = self.get_fold_key(params, fold)
+                if key not in self.cache:
+                    jobs.append((key, params, fold))
+        jobs = list({key: (key, params, fold) for key, params, fold in jobs}.values())
+
+        def get_tasks():
+            # Stops handing out fits once the deadline passes; fits already queued check it again
+            # in the worker before they start
+            for _, params, fold in jobs:
+                if deadline is not None and time.time() > deadline:
+                    return
+                yield delayed(fit_fold)(self.model, params, self.X_train, self.y_train, *self.splits[fold], deadline)
+
+        n_fits = 0
+        if jobs:
+            scores = Parallel(n_jobs=self.n_jobs)(get_tasks())
+            for (key, _, _), score in zip(jobs, scores):
+                if score is not None:
+                    self.cache[key] = score
+                    n_fits += 1
+            self.save_cache()
+
+        evaluated = []
+        for params in candidates:
+            keys = [self.get_fold_key(params, fold) for fold in range(self.n_splits)]
+            if all(key in self.cache for key in keys):
+                evaluated.append((params, float(np.mean([self.cache[key] for key in keys]))))
+        return evaluated, n_fits
+
+    def get_candidates(self, mode, param_grid, n_iter):
+        if mode == "grid":
+            return list(ParameterGrid(param_grid))
+        n_iter = min(n_iter, len(ParameterGrid(param_grid)))
+        return list(ParameterSampler(param_grid, n_iter, random_state=self.random_state))
+
+    def search(self, mode="halving", param_grid=PARAM_GRID, n_iter=60, factor=3, time_budget=None):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        start = time.perf_counter()
+        deadline = time.time() + time_budget if time_budget is not None else None
+        n_fits = 0
+        self.results = []
+
+        if mode == "halving":
+            # Successive halving with the tree count as the resource: every candidate starts with the
+            # fewest trees and only the best 1/factor advance to the next, larger forest
+            resource_name = "regressor__n_estimators"
+            resources = sorted(param_grid.get(resource_name, [100]))
+            sampled_grid = {name: values for name, values in param_grid.items() if name != resource_name}
+            candidates = self.get_candidates("random", sampled_grid, n_iter)
+
+            round_index = 0
+            while resources:
+                # A single survivor skips straight to the largest forest
+                resource = resources.pop(0) if len(candidates) > 1 else resources.pop()
+                round_candidates = [{**params, resource_name: resource} for params in candidates]
+                evaluated, round_fits = self.evaluate(round_candidates, deadline)
+                n_fits += round_fits
+                self.results.extend({"round": round_index, "params": params, "mse": mse} for params, mse in evaluated)
+                if not evaluated or len(candidates) == 1:
+                    break
+
+                evaluated.sort(key=lambda result: result[1])
+                keep = max(1, math.ceil(len(evaluated) / factor))
+                candidates = [
+                    {name: value for name, value in params.items() if name != resource_name}
+                    for params, _ in evaluated[:keep]
+                ]
+                round_index += 1
+        else:
+            candidates = self.get_candidates(mode, param_grid, n_iter)
+            evaluated, n_fits = self.evaluate(candidates, deadline)
+            self.results.extend({"round": 0, "params": params, "mse": mse} for params, mse in evaluated)
+
+        if not self.results:
+            raise RuntimeError("No candidate finished within the time budget")
+
+        # Later rounds use larger forests, so the best candidate is taken from the last round reached
+        last_round = max(result["round"] for result in self.results)
+        best = min((result for result in self.results if result["round"] == last_round), key=lambda result: result["mse"])
+
+        elapsed = time.perf_counter() - start
+        self.report = {
+            "mode": mode,
+            "best_params": best["params"],
+            "cv_mse": best["mse"],
+            "candidates_scored": len(self.results),
+            "fits": n_fits,
+            "cached_folds": len(self.results) * self.n_splits - n_fits,
+            "seconds": elapsed,
+            "time_budget": time_budget,
+            "budget_exceeded": time_budget is not None and elapsed > time_budget,
+        }
+        return best["params"]
+
+    def fit_best(self, params=None):
+        params = params if params is not None else self.report["best_params"]
+        best_model = clone(self.model).set_params(**params)
+        best_model.fit(self.X_train, self.y_train)
+
+        if len(self.X_test):
+            y_pred = best_model.predict(self.X_test)
+            self.report = dict(self.report or {})
+            self.report["test_mse"] = float(mean_squared_error(self.y_test, y_pred))
+            self.report["test_r2"] = float(r2_score(self.y_test, y_pred))
+        return best_model
+
+def main(argv=None):
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+    parser = argparse.ArgumentParser(description="Tune and train the soybean RandomForest model.")
+    parser.add_argument("--data", default=os.path.join(data_dir, "processed", "soybeans_model_training_data.parquet"))
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="halving")
+    parser.add_argument("--n-iter", type=int, default=60, help="candidates sampled in random and halving modes")
+    parser.add_argument("--factor", type=int, default=3)
+    parser.add_argument("--n-splits", type=int, default=5)
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds; no new fits start after it, fits already running finish")
+    parser.add_argument("--cache-dir", default=os.path.join(data_dir, "models", "cache"))
+    parser.add_argument("--output", default=os.path.join(data_dir, "models", "soybeans_model_v1.pkl"))
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args(argv)
+
+    reader = pd.read_parquet if args.data.endswith(".parquet") else pd.read_csv
+    trainer = ModelTrainer(reader(args.data), n_splits=args.n_splits, cache_dir=args.cache_dir, n_jobs=args.n_jobs)
+    trainer.search(args.mode, n_iter=args.n_iter, factor=args.factor, time_budget=args.time_budget)
+    model = trainer.fit_best()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    joblib.dump(model, args.output)
+    print(json.dumps(trainer.report, indent=2, default=str))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,464 @@
+import os
+import sys
+import json
+import time
+import logging
+import hashlib
+import argparse
+import inspect
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import alignment
+import commodity_spec
+import contract_cache
+import futures_curve
+import macro_indicators
+import instrumentation as instrumentation_module
+import manifest
+import price_matrix
+import price_processor
+import rolling_features
+import roll_schedule
+import wasde_processor
+import window_aggregator
+from instrumentation import Instrumentation, JsonLinesSink, LoggingSink
+from macro_indicators import GDP_WORKBOOK, MacroIndicatorBuilder
+from manifest import FileManifest, file_digest
+from price_processor import PriceProcessor
+from wasde_processor import WASDEProcessor
+
+class Stage:
+    def __init__(self, name, function, inputs, outputs, code=(), params=None):
+        self.name = name
+        self.function = function
+        self.inputs = [str(path) for path in inputs]
+        self.outputs = [str(path) for path in outputs]
+        self.code = list(code)
+        self.params = params or {}
+
+class Pipeline:
+    def __init__(self, stages, state_path, max_workers=None, log=print):
+        self.stages = list(stages)
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.log = log
+
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+
+        self.state = {}
+        if os.path.exists(state_path):
+            with open(state_path) as file:
+                self.state = json.load(file)
+        self.manifest = FileManifest(os.path.splitext(state_path)[0] + ".manifest.json")
+        self.dependencies = self.get_dependencies()
+
+    def get_producers(self, stage):
+        # The latest earlier stage writing each input; declaration order breaks cycles from in-place stages
+        producers = {}
+        for upstream in self.stages[: self.stages.index(stage)]:
+            for path in upstream.outputs:
+                if path in stage.inputs:
+                    producers[path] = upstream.name
+        return producers
+
+    def get_dependencies(self):
+        return {stage.name: set(self.get_producers(stage).values()) for stage in self.stages}
+
+    def get_input_digest(self, path):
+        if os.path.isdir(path):
+            digest = hashlib.sha256()
+            for file in sorted(Path(path).rglob("*")):
+                if file.is_file():
+                    digest.update(f"{file.relative_to(path)}:{self.manifest.get_digest(file)}\n".encode())
+            return digest.hexdigest()
+        if os.path.exists(path):
+            return self.manifest.get_digest(path)
+        return None
+
+    def get_fingerprint(self, stage, stage_keys):
+        producers = self.get_producers(stage)
+
+        inputs = {}
+        for path in stage.inputs:
+            if path in stage.outputs and path in producers:
+                # Rewritten in place by this stage, so the upstream stage key stands in for the content
+                inputs[path] = f"stage:{stage_keys.get(producers[path])}"
+            else:
+                inputs[path] = self.get_input_digest(path)
+
+        code = {module.__name__: file_digest(inspect.getsourcefile(module)) for module in stage.code}
+        params = json.dumps(stage.params, sort_keys=True, default=str)
+        fingerprint = {"inputs": inputs, "code": code, "params": params}
+        fingerprint["key"] = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+        return fingerprint
+
+    def get_run_reason(self, stage, fingerprint, ran_stages, force=False):
+        if force:
+            return "forced"
+
+        missing_inputs = [path for path, digest in fingerprint["inputs"].items() if digest is None]
+        if missing_inputs:
+            return f"missing input {missing_inputs[0]}"
+        missing_outputs = [path for path in stage.outputs if not os.path.exists(path)]
+        if missing_outputs:
+            return f"missing output {missing_outputs[0]}"
+
+        previous = self.state.get(stage.name)
+        if previous is None:
+            return "no previous run"
+        for path, digest in fingerprint["inputs"].items():
+            if previous["inputs"].get(path) != digest:
+                return f"input changed {path}"
+        if previous["code"] != fingerprint["code"]:
+            changed = sorted(name for name in set(previous["code"]) | set(fingerprint["code"])
+                             if previous["code"].get(name) != fingerprint["code"].get(name))
+            return f"code changed {', '.join(changed)}"
+        if previous["params"] != fingerprint["params"]:
+            return "parameters changed"
+
+        # An upstream rerun rewrote a file this stage updates in place
+        producers = self.get_producers(stage)
+        for path in stage.outputs:
+            if producers.get(path) in ran_stages:
+                return f"{producers[path]} rewrote {path}"
+        return None
+
+    def explain(self, force=False):
+        plan = []
+        stage_keys = {stage.name: self.state.get(stage.name, {}).get("key") for stage in self.stages}
+        will_run = set()
+
+        for stage in self.stages:
+            upstream = sorted(self.dependencies[stage.name] & will_run)
+            if upstream and not force:
+                # The upstream outputs are not known yet; the stage is skipped at run time if they come out identical
+                plan.append((stage.name, "run", f"after {', '.join(upstream)}"))
+                will_run.add(stage.name)
+                continue
+
+            fingerprint = self.get_fingerprint(stage, stage_keys)
+            reason = self.get_run_reason(stage, fingerprint, will_run, force)
+            if reason is None:
+                plan.append((stage.name, "skip", "up to date"))
+            else:
+                plan.append((stage.name, "run", reason))
+                will_run.add(stage.name)
+        return plan
+
+    def save_state(self):
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.state, file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.state_path)
+
+        # The manifest only caches content hashes so unchanged files are not re-read on the next run
+        self.manifest.update(self.get_input_files())
+        self.manifest.save()
+
+    def get_input_files(self):
+        files = []
+        for stage in self.stages:
+            for path in stage.inputs + stage.outputs:
+                if os.path.isdir(path):
+                    files.extend(str(file) for file in sorted(Path(path).rglob("*")) if file.is_file())
+                elif os.path.exists(path):
+                    files.append(path)
+        return list(dict.fromkeys(files))
+
+    def run(self, force=False):
+        stage_keys = {stage.name: self.state.get(stage.name, {}).get("key") for stage in self.stages}
+        pending = list(self.stages)
+        finished, ran_stages, running = set(), set(), {}
+
+        max_workers = self.max_workers or len(self.stages)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                ready = [stage for stage in pending if self.dependencies[stage.name] <= finished]
+                for stage in ready:
+                    pending.remove(stage)
+
+                    # Fingerprints are taken once upstream outputs exist, so an unchanged upstream result cuts off the rerun
+                    fingerprint = self.get_fingerprint(stage, stage_keys)
+                    reason = self.get_run_reason(stage, fingerprint, ran_stages, force)
+                    if reason is None:
+                        self.log(f"skip {stage.name}: up to date")
+                        stage_keys[stage.name] = fingerprint["key"]
+                        finished.add(stage.name)
+                        continue
+
+                    self.log(f"run  {stage.name}: {reason}")
+                    running[executor.submit(self.run_stage, stage)] = (stage, fingerprint)
+
+                if ready and not running:
+                    continue
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, fingerprint = running.pop(future)
+                    seconds = future.result()
+
+                    self.log(f"done {stage.name} in {seconds:.2f}s")
+                    self.state[stage.name] = fingerprint
+                    stage_keys[stage.name] = fingerprint["key"]
+                    finished.add(stage.name)
+                    ran_stages.add(stage.name)
+                    self.save_state()
+
+        return ran_stages
+
+    @staticmethod
+    def run_stage(stage):
+        start = time.perf_counter()
+        stage.function()
+        return time.perf_counter() - start
+
+def require_paths(directory, pattern):
+    # Raw sources are declared explicitly: a missing or empty source directory is an error, never
+    # a silently smaller rebuild
+    paths = sorted(str(path) for path in Path(directory).glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No {pattern} files in {directory}")
+    return paths
+
+def require_path(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Missing pipeline source: {path}")
+    return path
+
+def build_pipeline(
+    data_dir,
+    wasde_source="excel",
+    storage_format="json",
+    incremental=False,
+    max_workers=None,
+    instrumentation=None,
+    log=print,
+    indicators_source="csv",
+):
+    if wasde_source not in ("excel", "text", "interim"):
+        raise ValueError(f"Unknown WASDE source: {wasde_source}")
+    if indicators_source not in ("raw", "csv"):
+        raise ValueError(f"Unknown indicators source: {indicators_source}")
+
+    raw_dir = os.path.join(data_dir, "raw")
+    interim_dir = os.path.join(data_dir, "interim")
+    processed_dir = os.path.join(data_dir, "processed")
+
+    wasde_dir = os.path.join(raw_dir, "wasde")
+    wasde_excel_path = os.path.join(wasde_dir, "2000-2010", "World_WASDE_2000-2010.xlsx")
+    wasde_text_dir = os.path.join(wasde_dir, "2000-2010")
+    wasde_1020_dir = os.path.join(wasde_dir, "2010-2020")
+    wasde_2124_dir = os.path.join(wasde_dir, "2021-2024")
+    wasde_path = os.path.join(interim_dir, "wasde.parquet")
+
+    # "interim" starts from the existing wasde.parquet, for trees without every raw WASDE decade
+    if wasde_source == "interim":
+        wasde_source_paths, wasde_1020_paths = [], []
+        require_path(wasde_path)
+    else:
+        if wasde_source == "text":
+            require_paths(wasde_text_dir, "*.txt")
+            wasde_source_paths = [wasde_text_dir]
+        else:
+            wasde_source_paths = [require_path(wasde_excel_path)]
+        wasde_1020_paths = require_paths(wasde_1020_dir, "*.csv")
+        require_paths(wasde_2124_dir, "*.csv")
+    contract_dir = os.path.join(raw_dir, "historical_prices", "soybeans")
+    macro_dir = os.path.join(raw_dir, "macroeconomic_indicators")
+
+    wasde = WASDEProcessor(
+        excel_path=wasde_excel_path,
+        csv_paths=wasde_1020_paths,
+        csv_dir=wasde_2124_dir,
+        text_dir=wasde_text_dir if wasde_source == "text" else None,
+        max_workers=max_workers,
+        instrumentation=instrumentation,
+    )
+    prices = PriceProcessor(
+        contract_dir,
+        interim_dir,
+        processed_dir,
+        storage_format=storage_format,
+        max_workers=max_workers,
+        instrumentation=instrumentation,
+        contract_cache_dir=os.path.join(interim_dir, "contract_cache"),
+    )
+
+    wasde_aggregate_path = os.path.join(interim_dir, "wasde_aggregate.parquet")
+    macro = MacroIndicatorBuilder(macro_dir, max_workers=max_workers, instrumentation=instrumentation)
+    if indicators_source == "raw":
+        indicators_path = os.path.join(interim_dir, "macroeconomic_indicators.parquet")
+    else:
+        indicators_path = os.path.join(interim_dir, "macroeconomic_indicators.csv")
+    cot_dir = os.path.join(raw_dir, "commitment_of_traders")
+
+    def aggregate_wasde_data():
+        report_dates = wasde.updated_report_dates if incremental else None
+        wasde.aggregate_wasde_data(wasde_path, wasde_aggregate_path, report_dates)
+
+    wasde_code = [wasde_processor, manifest, instrumentation_module]
+    # commodity_spec holds the contract sequences and roll tables every price stage is built on
+    price_code = [
+        price_processor,
+        price_matrix,
+        roll_schedule,
+        commodity_spec,
+        manifest,
+        instrumentation_module,
+        contract_cache,
+    ]
+    stages = [
+        Stage(
+            "build_macro_indicators",
+            lambda: macro.build_to_parquet(indicators_path),
+            macro.get_market_paths() + [os.path.join(macro_dir, GDP_WORKBOOK)],
+            [indicators_path],
+            [macro_indicators, price_processor, instrumentation_module],
+        ),
+        Stage(
+            "process_wasde_data",
+            lambda: wasde.process_wasde_data(wasde_path, incremental=incremental),
+            wasde_source_paths + wasde_1020_paths + [wasde_2124_dir],
+            [wasde_path],
+            wasde_code,
+            {"wasde_source": wasde_source},
+        ),
+        Stage(
+            "aggregate_wasde_data",
+            aggregate_wasde_data,
+            [wasde_path],
+            [wasde_aggregate_path],
+            wasde_code,
+        ),
+        Stage(
+            "filter_soybeans_wasde_data",
+            lambda: wasde.filter_soybeans_wasde_data(wasde_aggregate_path, prices.wasde_data_path),
+            [wasde_aggregate_path],
+            [prices.wasde_data_path],
+            wasde_code,
+        ),
+        Stage(
+            "append_indicators",
+            lambda: wasde.append_indicators(
+                prices.wasde_data_path,
+                indicators_path,
+                prices.wasde_indicators_path,
+                indicator_lag=alignment.INDICATOR_PUBLICATION_LAG,
+            ),
+            [prices.wasde_data_path, indicators_path],
+            [prices.wasde_indicators_path],
+            wasde_code + [alignment],
+        ),
+        Stage(
+            "append_cot_positions",
+            lambda: wasde.append_cot_positions(
+                prices.wasde_indicators_path, sorted(Path(cot_dir).glob("*.csv")), prices.model_input_data_path
+            ),
+            [prices.wasde_indicators_path, cot_dir],
+            [prices.model_input_data_path],
+            wasde_code + [alignment],
+        ),
+        Stage(
+            "aggregate_price_data",
+            lambda: prices.aggregate_price_data(incremental=incremental),
+            [contract_dir, prices.trading_dates_path],
+            [prices.aggregate_price_path],
+            price_code,
+            {"storage_format": storage_format},
+        ),
+        Stage(
+            "generate_continuous_price_data",
+            prices.generate_continuous_price_data,
+            [prices.aggregate_price_path, prices.trading_dates_path, prices.wasde_data_path],
+            [prices.continuous_price_path, prices.continuous_price_ext_path],
+            price_code,
+            {"storage_format": storage_format},
+        ),
+        Stage(
+            "generate_futures_curve",
+            prices.generate_futures_curve,
+            [prices.aggregate_price_path, prices.trading_dates_path, prices.wasde_data_path],
+            [prices.futures_curve_path],
+            price_code + [futures_curve],
+            {"storage_format": storage_format},
+        ),
+        Stage(
+            "generate_rolling_features",
+            lambda: prices.generate_rolling_features(incremental=incremental),
+            [prices.continuous_price_path],
+            [prices.rolling_features_path],
+            price_code + [rolling_features],
+        ),
+        Stage(
+            "aggregate_model_input_data",
+            prices.aggregate_model_input_data,
+            [prices.model_input_data_path, prices.continuous_price_path],
+            [prices.model_training_data_path, prices.model_training_csv_path],
+            price_code + [window_aggregator],
+        ),
+    ]
+    skipped_stages = set()
+    if indicators_source == "csv":
+        # The indicator table is maintained by hand
+        skipped_stages.add("build_macro_indicators")
+    if wasde_source == "interim":
+        skipped_stages.add("process_wasde_data")
+    stages = [stage for stage in stages if stage.name not in skipped_stages]
+    return Pipeline(stages, os.path.join(interim_dir, "pipeline_state.json"), max_workers=max_workers, log=log)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the soybean data pipeline, skipping stages that are up to date.")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+    parser.add_argument(
+        "--wasde-source",
+        choices=["excel", "text", "interim"],
+        default="excel",
+        help="interim skips parsing and starts from the existing interim/wasde.parquet",
+    )
+    parser.add_argument(
+        "--indicators-source",
+        choices=["raw", "csv"],
+        default="csv",
+        help="read the maintained indicator CSV, or build it from the raw macro files (GDP still comes from the workbook)",
+    )
+    parser.add_argument("--storage-format", choices=["json", "columnar"], default="json")
+    parser.add_argument("--incremental", action="store_true", help="only parse new or changed raw files")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="rerun every stage")
+    parser.add_argument("--dry-run", "--explain", dest="dry_run", action="store_true", help="print the plan without running")
+    parser.add_argument("--instrument", metavar="PATH", help="append per-stage metrics to this JSON lines file")
+    parser.add_argument("--profile-stage", action="append", default=[], help="cProfile this processor method")
+    parser.add_argument("--profile-dir", default=None)
+    args = parser.parse_args(argv)
+
+    instrumentation = None
+    if args.instrument or args.profile_stage:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        sinks = [LoggingSink()] + ([JsonLinesSink(args.instrument)] if args.instrument else [])
+        instrumentation = Instrumentation(sinks, profile_stages=args.profile_stage, profile_dir=args.profile_dir)
+
+    pipeline = build_pipeline(
+        os.path.normpath(args.data_dir),
+        wasde_source=args.wasde_source,
+        storage_format=args.storage_format,
+        incremental=args.incremental,
+        max_workers=args.max_workers,
+        instrumentation=instrumentation,
+        indicators_source=args.indicators_source,
+    )
+
+    if args.dry_run:
+        for name, action, reason in pipeline.explain(force=args.force):
+            print(f"{action:<4} {name}: {reason}")
+        return 0
+
+    pipeline.run(force=args.force)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
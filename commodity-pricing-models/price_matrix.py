@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+class PriceMatrix:
+    fields = ["Open", "High", "Low", "Last", "Volume", "Open Int"]
+
+    def __init__(self, dates, contracts, values=None):
+        self.dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+        self.contracts = list(contracts)
+        self.__contract_index = {contract: i for i, contract in enumerate(self.contracts)}
+
+        if values is None:
+            values = np.full((len(self.fields), len(self.dates), len(self.contracts)), np.nan)
+        self.values = values
+
+    def contract_index(self, contract):
+        return self.__contract_index[contract]
+
+    def field(self, field):
+        # (dates x contracts) view, no copy
+        return self.values[self.fields.index(field)]
+
+    def contract(self, contract, field=None):
+        if field is None:
+            return self.values[:, :, self.contract_index(contract)]
+        return self.values[self.fields.index(field), :, self.contract_index(contract)]
+
+    def set_prices(self, data):
+        # Scatter a long frame (Date, Contract, fields...) onto the matrix; rows off the date index are dropped
+        dates = data["Date"].to_numpy(dtype="datetime64[ns]")
+        positions = np.clip(np.searchsorted(self.dates, dates), 0, max(len(self.dates) - 1, 0))
+        matched = self.dates[positions] == dates if len(self.dates) else np.zeros(len(dates), dtype=bool)
+
+        columns = np.array([self.contract_index(contract) for contract in data["Contract"].astype(str)], dtype="int64")
+        for i, field in enumerate(self.fields):
+            self.values[i, positions[matched], columns[matched]] = data[field].to_numpy(dtype="float64")[matched]
+
+    def reindex(self, dates, contracts):
+        # New matrix on the given axes, carrying over every cell present in both
+        price_matrix = PriceMatrix(dates, contracts)
+        date_positions = np.clip(np.searchsorted(self.dates, price_matrix.dates), 0, max(len(self.dates) - 1, 0))
+        matched_dates = self.dates[date_positions] == price_matrix.dates if len(self.dates) else np.zeros(len(price_matrix.dates), dtype=bool)
+
+        shared_contracts = [contract for contract in price_matrix.contracts if contract in self.__contract_index]
+        old_columns = [self.contract_index(contract) for contract in shared_contracts]
+        new_columns = [price_matrix.contract_index(contract) for contract in shared_contracts]
+
+        fields = np.arange(len(self.fields))
+        price_matrix.values[np.ix_(fields, np.flatnonzero(matched_dates), new_columns)] = (
+            self.values[np.ix_(fields, date_positions[matched_dates], old_columns)]
+        )
+        return price_matrix
+
+    def to_frame(self):
+        # Long layout (Date, Contract, fields...) keeping only cells with any price data
+        date_index, contract_index = np.nonzero(~np.isnan(self.values).all(axis=0))
+        order = np.lexsort((date_index, contract_index))
+        date_index, contract_index = date_index[order], contract_index[order]
+
+        frame = pd.DataFrame({
+            "Date": self.dates[date_index],
+            "Contract": pd.Categorical.from_codes(contract_index, categories=self.contracts),
+        })
+        for i, field in enumerate(self.fields):
+            frame[field] = self.values[i, date_index, contract_index]
+        return frame
+
+    @classmethod
+    def from_frame(cls, data):
+        contracts = data["Contract"].astype("category").cat.categories
+        price_matrix = cls(np.unique(data["Date"].to_numpy(dtype="datetime64[ns]")), contracts)
+        price_matrix.set_prices(data)
+        return price_matrix
+
+    def to_parquet(self, path):
+        self.to_frame().to_parquet(path, index=False, compression="zstd")
+
+    @classmethod
+    def read_parquet(cls, path):
+        return cls.from_frame(pd.read_parquet(path))
@@ -1,24 +1,112 @@
 import os
 import json
+import time
+import hashlib
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from commodity_spec import get_commodity_spec
+from contract_cache import ContractCache
+from futures_curve import FuturesCurve, get_expiries
+from instrumentation import NULL_INSTRUMENTATION, instrumented
+from manifest import FileManifest, manifest_path
+from price_matrix import PriceMatrix
+from roll_schedule import RollSchedule
+from rolling_features import LOOKBACKS, RollingFeatureEngine
+from window_aggregator import MODEL_INPUT_STATISTICS, WindowAggregator, get_array_columns, to_arrow_table, to_list_literal
+
+# Numeric Barchart columns; "%Chg" ("+0.40%") is converted separately
+CONTRACT_DTYPES = {
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Last": "float64",
+    "Change": "float64",
+    "Volume": "float64",
+    "Open Int": "float64",
+}
+
+# Bump when read_contract_csv changes its output; cached contract frames from another parser
+# version are re-parsed
+CONTRACT_PARSER_VERSION = 2
+CONTRACT_CACHE_VERSION = hashlib.sha1(
+    json.dumps([CONTRACT_PARSER_VERSION, CONTRACT_DTYPES], sort_keys=True).encode()
+).hexdigest()[:12]
+
+def read_contract_csv(path):
+    start = time.perf_counter()
+
+    # Barchart exports end with a "Downloaded from ..." footer row
+    contract_price_data = pd.read_csv(path, dtype=CONTRACT_DTYPES).iloc[:-1]
+    contract_price_data = contract_price_data.rename(columns={"Time": "Date"})
+    contract_price_data["Date"] = pd.to_datetime(contract_price_data["Date"], format="%m/%d/%Y")
+    contract_price_data["%Chg"] = pd.to_numeric(contract_price_data["%Chg"].astype(str).str.rstrip("%"), errors="coerce")
+    return contract_price_data, time.perf_counter() - start
+
+def load_contract(path, cache=None):
+    # Typed columns from the contract cache while it is current, otherwise parse and refresh it.
+    # Also returns the file actually read (the cache entry or the CSV) for I/O accounting
+    if cache is None:
+        return read_contract_csv(path) + (path,)
+
+    start = time.perf_counter()
+    if cache.is_valid(path):
+        return cache.read(path), time.perf_counter() - start, cache.get_cache_path(path)
+
+    contract_price_data, _ = read_contract_csv(path)
+    cache.write(path, contract_price_data)
+    return contract_price_data, time.perf_counter() - start, path
 
 class PriceProcessor:
-    def __init__(self, input_dir=None, interim_dir=None, output_dir=None):
+    def __init__(
+        self,
+        input_dir=None,
+        interim_dir=None,
+        output_dir=None,
+        storage_format="json",
+        max_workers=None,
+        executor="thread",
+        instrumentation=None,
+        commodity="soybeans",
+        contract_cache_dir=None,
+    ):
         
+        if storage_format not in ("json", "columnar"):
+            raise ValueError(f"Unknown storage format: {storage_format}")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+
         self.raw_data_dir = input_dir
         self.interim_data_dir = interim_dir
         self.processed_data_dir = output_dir
 
+        self.storage_format = storage_format
+        self.max_workers = max_workers
+        self.executor = executor
+        self.load_report = None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.commodity = get_commodity_spec(commodity)
+        self.contract_cache = ContractCache(contract_cache_dir, CONTRACT_CACHE_VERSION) if contract_cache_dir is not None else None
+
         self.trading_dates_path = os.path.join(self.interim_data_dir, "trading_dates.parquet")
         self.wasde_data_path = os.path.join(self.interim_data_dir,"wasde_soybeans.parquet")
+        self.wasde_indicators_path = os.path.join(self.interim_data_dir, "wasde_soybeans_indicators.parquet")
         
-        self.aggregate_price_path = os.path.join(self.interim_data_dir, "prices_soybeans_aggregate.parquet")
-        self.continuous_price_path = os.path.join(self.interim_data_dir, "prices_soybeans_continuous.parquet")
-        self.continuous_price_ext_path = os.path.join(self.interim_data_dir, "prices_soybeans_continuous_ext.parquet")
+        # The two storage formats lay the aggregate out differently, so each gets its own file
+        aggregate_series = "aggregate_columnar" if storage_format == "columnar" else "aggregate"
+        self.aggregate_price_path = self.commodity.get_interim_path(self.interim_data_dir, aggregate_series)
+        self.continuous_price_path = self.commodity.get_interim_path(self.interim_data_dir, "continuous")
+        self.continuous_price_ext_path = self.commodity.get_interim_path(self.interim_data_dir, "continuous_ext")
+        self.futures_curve_path = self.commodity.get_interim_path(self.interim_data_dir, "curve", extension="")
+        self.rolling_features_path = self.commodity.get_interim_path(self.interim_data_dir, "rolling_features")
+        self.model_input_data_path = os.path.join(self.interim_data_dir, f"{self.commodity.name}_model_input_data.parquet")
         
-        self.model_training_data_path = os.path.join(self.processed_data_dir, "soybeans_model_training_data.parquet")
-        self.model_training_csv_path = os.path.join(self.processed_data_dir, "soybeans_model_training_data.csv")
-        self.__contract_sequence = ["SF", "SH", "SK", "SN", "SQ", "SU", "SX"]
+        self.model_training_data_path = os.path.join(self.processed_data_dir, f"{self.commodity.name}_model_training_data.parquet")
+        self.model_training_csv_path = os.path.join(self.processed_data_dir, f"{self.commodity.name}_model_training_data.csv")
+        self.__contract_sequence = list(self.commodity.contract_sequence)
 
     @staticmethod
     def unpack_prices(price_json):
@@ -33,31 +121,6 @@ class PriceProcessor:
         except (json.JSONDecodeError, ValueError, TypeError):
             return None, None
 
-    @staticmethod
-    def determine_contract(month, year, date, wasde_date):
-        yr = str(year)[-2:]  # Get the last two digits of the year
-        contracts = {
-            1: (f"SF{yr}", f"SH{yr}"),
-            2: (f"SH{yr}", f"SH{yr}"),
-            3: (f"SH{yr}", f"SK{yr}"),
-            4: (f"SK{yr}", f"SK{yr}"),
-            5: (f"SK{yr}", f"SN{yr}"),
-            6: (f"SN{yr}", f"SN{yr}"),
-            7: (f"SN{yr}", f"SQ{yr}"),
-            8: (f"SQ{yr}", f"SU{yr}"),
-            9: (f"SU{yr}", f"SX{yr}"),
-            10: (f"SX{yr}", f"SX{yr}"),
-            11: (f"SX{yr}", f"SF{str(int(year) + 1)[-2:]}"),
-            12: (f"SF{str(int(year) + 1)[-2:]}", f"SF{str(int(year) + 1)[-2:]}"),
-        }
-        
-        current_contract, next_contract = contracts.get(month, ("", ""))
-        
-        if date >= wasde_date:
-            return next_contract
-        else:
-            return current_contract
-
     @staticmethod
     def generate_price_data(row):
         price_high = row["High"]
@@ -73,13 +136,14 @@ class PriceProcessor:
         base_contract_name = base_contract[:-2]
         base_index = self.__contract_sequence.index(base_contract_name)
 
+        tenors = len(self.__contract_sequence)
         contracts = [f"{contract}{year_suffix}" for contract in self.__contract_sequence[base_index:]]
-        if len(contracts) < 7:
+        if len(contracts) < tenors:
             next_year_suffix = f"{(int(year_suffix) + 1) % 100:02}"
             contracts.extend(
-                [f"{contract}{next_year_suffix}" for contract in self.__contract_sequence[: 7 - len(contracts)]]
+                [f"{contract}{next_year_suffix}" for contract in self.__contract_sequence[: tenors - len(contracts)]]
             )
-        return contracts[:7]
+        return contracts[:tenors]
     
     def get_sorted_contract_names(self, csv_files, years):
         contracts_sorted_by_expiration = []
@@ -90,190 +154,273 @@ class PriceProcessor:
                     contracts_sorted_by_expiration.append(contract_name)
         return contracts_sorted_by_expiration
 
+    @instrumented
+    def load_contract_data(self, contracts_sorted_by_expiration):
+        paths = [os.path.join(self.raw_data_dir, contract) for contract in contracts_sorted_by_expiration]
+
+        caches = [self.contract_cache] * len(paths)
+        if self.max_workers == 1 or len(paths) <= 1:
+            results = [load_contract(path, cache) for path, cache in zip(paths, caches)]
+        else:
+            executor_class = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+            with executor_class(max_workers=self.max_workers) as executor:
+                results = list(executor.map(load_contract, paths, caches))
+
+        for contract_price_data, _, read_path in results:
+            self.instrumentation.read(read_path, rows=len(contract_price_data))
+
+        self.load_report = pd.DataFrame({
+            "File": contracts_sorted_by_expiration,
+            "Rows": [len(contract_price_data) for contract_price_data, _, _ in results],
+            "Seconds": [seconds for _, seconds, _ in results],
+        })
+
+        contract_names = [contract.replace(".csv", "") for contract in contracts_sorted_by_expiration]
+        frames = [contract_price_data for contract_price_data, _, _ in results]
+        if not frames:
+            return pd.DataFrame(columns=["Contract", "Date"] + PriceMatrix.fields)
+
+        long_price_data = pd.concat(frames, keys=contract_names, names=["Contract", None]).reset_index(level=0)
+        long_price_data["Contract"] = pd.Categorical(long_price_data["Contract"], categories=contract_names)
+        return long_price_data.reset_index(drop=True)
+
+    @instrumented
     def process_raw_price_data(self, contracts_sorted_by_expiration, all_price_data):
         all_price_data['Date'] = pd.to_datetime(all_price_data['Date'])
-        for contract in contracts_sorted_by_expiration:
-            contract_name = contract.replace(".csv", "")
-            path = os.path.join(self.raw_data_dir, contract)
-
-            contract_price_data = pd.read_csv(path).iloc[:-1]
-            contract_price_data = contract_price_data.rename(columns={"Time": "Date"})
-            contract_price_data["Date"] = pd.to_datetime(contract_price_data["Date"])
-            contract_price_data["Price"] = contract_price_data.apply(self.generate_price_data, axis=1)
-
-            all_price_data = all_price_data.merge(
-                contract_price_data[["Date", "Price"]],
-                on="Date",
-                how="left",
-                suffixes=("", f"_{contract_name}"),
-            )
-            all_price_data.rename(columns={"Price": f"{contract_name}"}, inplace=True)
+        contract_names = [contract.replace(".csv", "") for contract in contracts_sorted_by_expiration]
+        long_price_data = self.load_contract_data(contracts_sorted_by_expiration)
 
+        if self.storage_format == "columnar":
+            price_matrix = PriceMatrix(all_price_data["Date"], contract_names)
+            price_matrix.set_prices(long_price_data)
+            return price_matrix
+
+        long_price_data["Price"] = long_price_data.apply(self.generate_price_data, axis=1)
+        wide_price_data = long_price_data.pivot(index="Date", columns="Contract", values="Price")
+        wide_price_data = wide_price_data.reindex(columns=contract_names)
+        wide_price_data.columns = list(wide_price_data.columns)
+
+        all_price_data = all_price_data.merge(wide_price_data, left_on="Date", right_index=True, how="left")
         return all_price_data.fillna("")
 
-    def process_continuous_data(self, trading_dates, wasde_dates, price_data):
-        continuous_data = []
-        wasde_iter = iter(wasde_dates["Report Date"])
-        current_wasde_date = next(wasde_iter, None)
-        contract_name = None
-
-        for date in trading_dates["Date"]:
-            if current_wasde_date is not None and date >= current_wasde_date:
-                month, year = date.month, date.year
-                contract_name = self.determine_contract(month, year, date, current_wasde_date)
-                
-                try:
-                    current_wasde_date = next(wasde_iter)
-                except StopIteration:
-                    current_wasde_date = wasde_dates["Report Date"].iloc[-1]
-            
-            if contract_name and not price_data.loc[price_data["Date"] == date, contract_name].empty:
-                daily_price_json = price_data.loc[price_data["Date"] == date, contract_name].values[0]
-                high, low = self.unpack_prices(daily_price_json)
-
-                if high is not None and low is not None:
-                    average = (high + low) / 2
-                    continuous_data.append([date, contract_name, high, low, average])
-
-        return pd.DataFrame(
-            continuous_data, columns=["Date", "Contract", "High", "Low", "Average"]
+    @instrumented
+    def update_raw_price_data(self, contracts_sorted_by_expiration, all_price_data, price_data, changed_contracts):
+        # Re-parse only the changed contracts and carry every other contract over from price_data
+        contract_names = [contract.replace(".csv", "") for contract in contracts_sorted_by_expiration]
+        changed_names = [contract.replace(".csv", "") for contract in changed_contracts]
+        if self.storage_format == "columnar":
+            price_matrix = price_data.reindex(all_price_data["Date"], contract_names)
+            if changed_contracts:
+                changed_data = self.process_raw_price_data(changed_contracts, all_price_data.copy())
+                for contract in changed_names:
+                    price_matrix.values[:, :, price_matrix.contract_index(contract)] = changed_data.contract(contract)
+            return price_matrix
+
+        unchanged_names = [contract for contract in contract_names if contract not in changed_names]
+        wide_price_data = price_data.set_index("Date").reindex(all_price_data["Date"])[unchanged_names]
+        if changed_contracts:
+            changed_data = self.process_raw_price_data(changed_contracts, all_price_data.copy())
+            wide_price_data = pd.concat([wide_price_data, changed_data.set_index("Date")[changed_names]], axis=1)
+        wide_price_data = wide_price_data.reindex(columns=contract_names)
+
+        all_price_data = all_price_data.merge(wide_price_data, left_on="Date", right_index=True, how="left")
+        return all_price_data.fillna("")
+
+    def read_aggregate_price_data(self):
+        if self.storage_format == "columnar":
+            return PriceMatrix.read_parquet(self.aggregate_price_path)
+        return pd.read_parquet(self.aggregate_price_path)
+
+    def get_roll_table(self):
+        return self.commodity.roll_table
+
+    def get_roll_schedule(self, trading_dates, wasde_dates):
+        return RollSchedule(
+            trading_dates["Date"], wasde_dates["Report Date"], self.__contract_sequence, self.get_roll_table()
         )
 
+    def gather_prices(self, price_data, dates, contracts):
+        if isinstance(price_data, PriceMatrix):
+            price_dates = price_data.dates
+            columns = np.array([price_data.contract_index(contract) for contract in contracts], dtype="int64")
+        else:
+            price_dates = price_data["Date"].to_numpy(dtype="datetime64[ns]")
+            columns = price_data.columns.get_indexer(contracts)
+            if (columns < 0).any():
+                raise KeyError(sorted(set(np.asarray(contracts)[columns < 0])))
+
+        rows = np.clip(np.searchsorted(price_dates, dates), 0, max(len(price_dates) - 1, 0))
+        matched = price_dates[rows] == dates if len(price_dates) else np.zeros(len(dates), dtype=bool)
+
+        high = np.full(len(dates), np.nan)
+        low = np.full(len(dates), np.nan)
+        if isinstance(price_data, PriceMatrix):
+            high[matched] = price_data.field("High")[rows[matched], columns[matched]]
+            low[matched] = price_data.field("Low")[rows[matched], columns[matched]]
+        else:
+            unique_columns, inverse = np.unique(columns, return_inverse=True)
+            cells = price_data.iloc[:, unique_columns].to_numpy(dtype=object)[rows[matched], inverse[matched]]
+            unpacked = [self.unpack_prices(cell) for cell in cells]
+            high[matched] = [price_high if price_high is not None else np.nan for price_high, _ in unpacked]
+            low[matched] = [price_low if price_low is not None else np.nan for _, price_low in unpacked]
+        return high, low
+
+    def build_price_series(self, price_data, dates, contracts):
+        high, low = self.gather_prices(price_data, dates, contracts)
+        valid = ~(np.isnan(high) | np.isnan(low))
+        self.instrumentation.write(rows=int(valid.sum()))
+
+        return pd.DataFrame({
+            "Date": dates[valid],
+            "Contract": contracts[valid],
+            "High": high[valid],
+            "Low": low[valid],
+            "Average": (high[valid] + low[valid]) / 2,
+        })
+
+    @instrumented
+    def process_continuous_data(self, trading_dates, wasde_dates, price_data):
+        roll_schedule = self.get_roll_schedule(trading_dates, wasde_dates)
+        dates, contracts = roll_schedule.active_contracts()
+        return self.build_price_series(price_data, dates, contracts)
+
+    @instrumented
     def process_year_ahead_pricing_data(self, trading_dates, wasde_dates, price_data):
-        continuous_data_ext = []
-        wasde_iter = iter(wasde_dates["Report Date"])
-        current_wasde_date = next(wasde_iter, None)
-        contract_name = None
-        contract_collection = []
-
-        for date in trading_dates["Date"]:
-            if current_wasde_date is not None and date >= current_wasde_date:
-                month, year = date.month, date.year
-                contract_name = self.determine_contract(month, year, date, current_wasde_date)
-                contract_collection = self.get_next_contracts(contract_name)
-
-                try:
-                    current_wasde_date = next(wasde_iter)
-                except StopIteration:
-                    current_wasde_date = wasde_dates["Report Date"].iloc[-1]
-
-            for contract in contract_collection:
-                if contract and not price_data.loc[price_data["Date"] == date, contract].empty:
-                    daily_price_json = price_data.loc[price_data["Date"] == date, contract].values[0]
-                    high, low = self.unpack_prices(daily_price_json)
-
-                    if high is not None and low is not None:
-                        average = (high + low) / 2
-                        continuous_data_ext.append([date, contract, high, low, average])
-                        
-        return pd.DataFrame(
-            continuous_data_ext, columns=["Date", "Contract", "High", "Low", "Average"]
-        )
-    
-    def aggregate_price_data(self):
+        roll_schedule = self.get_roll_schedule(trading_dates, wasde_dates)
+        dates, contracts = roll_schedule.contract_strip(len(self.__contract_sequence))
+        return self.build_price_series(price_data, dates, contracts)
+
+    @instrumented
+    def build_futures_curve(self, trading_dates, wasde_dates, price_data):
+        # Same strip as process_year_ahead_pricing_data, kept dense as (dates x tenors)
+        roll_schedule = self.get_roll_schedule(trading_dates, wasde_dates)
+        active, strip_symbols, strip_years = roll_schedule.get_strip_positions(len(self.__contract_sequence))
+        contracts = roll_schedule.get_contract_labels(strip_symbols, strip_years)
+        dates = roll_schedule.dates[active]
+
+        high, low = self.gather_prices(price_data, np.repeat(dates, contracts.shape[1]), contracts.ravel())
+        curve = FuturesCurve(dates, contracts, get_expiries(self.__contract_sequence, strip_symbols, strip_years))
+        curve.field("High")[:] = high.reshape(contracts.shape)
+        curve.field("Low")[:] = low.reshape(contracts.shape)
+        curve.field("Average")[:] = (curve.field("High") + curve.field("Low")) / 2
+        return curve
+
+    @instrumented
+    def aggregate_price_data(self, incremental=False):
         trading_dates = pd.read_parquet(self.trading_dates_path)
+        self.instrumentation.read(self.trading_dates_path, rows=len(trading_dates))
 
         data = pd.DataFrame(trading_dates, columns=["Date"])
-        symbols = ["SF", "SH", "SK", "SN", "SQ", "SU", "SX"]
         years = list(range(2000, pd.Timestamp.today().year + 2))
 
         contract_csv_collection = [f for f in os.listdir(self.raw_data_dir) if f.endswith(".csv")]
-        contracts_sorted = self.get_sorted_contract_names(contract_csv_collection, symbols, years)
-
-        data = self.process_raw_price_data(self.raw_data_dir, contracts_sorted, data)
-        data.to_parquet(self.aggregate_price_path, index=False)
+        contracts_sorted = self.get_sorted_contract_names(contract_csv_collection, years)
+
+        contract_paths = [os.path.join(self.raw_data_dir, contract) for contract in contracts_sorted]
+        manifest = FileManifest(manifest_path(self.aggregate_price_path))
+
+        if incremental and manifest.entries and os.path.exists(self.aggregate_price_path):
+            # Removed contracts simply drop out of the reindexed aggregate
+            price_data = self.read_aggregate_price_data()
+            previous_contracts = price_data.contracts if self.storage_format == "columnar" else list(price_data.columns)
+            changed_paths = set(manifest.changed(contract_paths))
+            changed_contracts = [
+                contract for contract, path in zip(contracts_sorted, contract_paths)
+                if path in changed_paths or contract.replace(".csv", "") not in previous_contracts
+            ]
+            data["Date"] = pd.to_datetime(data["Date"])
+            data = self.update_raw_price_data(contracts_sorted, data, price_data, changed_contracts)
+        else:
+            data = self.process_raw_price_data(contracts_sorted, data)
+        if self.storage_format == "columnar":
+            data.to_parquet(self.aggregate_price_path)
+        else:
+            data.to_parquet(self.aggregate_price_path, index=False)
+        self.instrumentation.write(self.aggregate_price_path, rows=len(data) if self.storage_format == "json" else len(data.dates))
+        manifest.update(contract_paths)
+        manifest.save()
 
+    @instrumented
     def generate_continuous_price_data(self):
-        price_data = pd.read_parquet(self.aggregate_price_path)
+        price_data = self.read_aggregate_price_data()
         trading_dates = pd.read_parquet(self.trading_dates_path)
         wasde_dates = pd.read_parquet(self.wasde_data_path)
+        self.instrumentation.read(self.aggregate_price_path)
+        self.instrumentation.read(self.trading_dates_path, rows=len(trading_dates))
+        self.instrumentation.read(self.wasde_data_path, rows=len(wasde_dates))
 
         trading_dates["Date"] = pd.to_datetime(trading_dates["Date"])
         wasde_dates["Report Date"] = pd.to_datetime(wasde_dates["Report Date"])
 
         price_continuous = self.process_continuous_data(trading_dates, wasde_dates, price_data)
         price_continuous.to_parquet(self.continuous_price_path, index=False)
+        self.instrumentation.write(self.continuous_price_path, rows=len(price_continuous))
         
         price_ext = self.process_year_ahead_pricing_data(trading_dates, wasde_dates, price_data)
         price_ext.to_parquet(self.continuous_price_ext_path, index=False)
+        self.instrumentation.write(self.continuous_price_ext_path, rows=len(price_ext))
+
+    @instrumented
+    def generate_futures_curve(self):
+        price_data = self.read_aggregate_price_data()
+        trading_dates = pd.read_parquet(self.trading_dates_path)
+        wasde_dates = pd.read_parquet(self.wasde_data_path)
+        self.instrumentation.read(self.aggregate_price_path)
+        self.instrumentation.read(self.trading_dates_path, rows=len(trading_dates))
+        self.instrumentation.read(self.wasde_data_path, rows=len(wasde_dates))
 
-    def aggregate_model_input_data(self):
-        processed_data = pd.read_parquet(self.model_training_data_path)
+        trading_dates["Date"] = pd.to_datetime(trading_dates["Date"])
+        wasde_dates["Report Date"] = pd.to_datetime(wasde_dates["Report Date"])
+
+        curve = self.build_futures_curve(trading_dates, wasde_dates, price_data)
+        curve.save(self.futures_curve_path)
+        self.instrumentation.write(self.futures_curve_path, rows=len(curve))
+
+    @instrumented
+    def generate_rolling_features(self, incremental=False, lookbacks=LOOKBACKS):
+        continuous_data = pd.read_parquet(self.continuous_price_path)
+        self.instrumentation.read(self.continuous_price_path, rows=len(continuous_data))
+        engine = RollingFeatureEngine(lookbacks)
+
+        features = None
+        if incremental and os.path.exists(self.rolling_features_path):
+            features = pd.read_parquet(self.rolling_features_path)
+            self.instrumentation.read(self.rolling_features_path, rows=len(features))
+
+            # Only new days are appended; a revised history or new lookbacks need a full pass
+            if not engine.is_current(features, continuous_data):
+                features = None
+
+        if features is not None:
+            features = engine.update(features, continuous_data)
+        else:
+            features = engine.compute(continuous_data)
+
+        features.to_parquet(self.rolling_features_path, index=False)
+        self.instrumentation.write(self.rolling_features_path, rows=len(features))
+
+    @instrumented
+    def aggregate_model_input_data(self, window_type="after", window_size=15, statistics=MODEL_INPUT_STATISTICS):
+        processed_data = pd.read_parquet(self.model_input_data_path)
         daily_price_data = pd.read_parquet(self.continuous_price_path)
+        self.instrumentation.read(self.model_input_data_path, rows=len(processed_data))
+        self.instrumentation.read(self.continuous_price_path, rows=len(daily_price_data))
 
-        # Standardize date columns to datetime.date
         processed_data.rename(columns={"Report Date": "Date"}, inplace=True)
         processed_data["Date"] = pd.to_datetime(processed_data["Date"]).dt.date
-        daily_price_data["Date"] = pd.to_datetime(daily_price_data["Date"]).dt.date
-
-        # Initialize lists to store results
-        price_high_list = []
-        price_low_list = []
-        price_average_list = []
-        price_collections = []
-
-        # Create an iterator over the report dates
-        report_date_iter = iter(processed_data["Date"])
-
-        # Get the first report date
-        start_date = next(report_date_iter, None)
-
-        # Iterate through report dates
-        for end_date in report_date_iter:
-            # Filter the daily_price_data for the date range
-            group = daily_price_data[(daily_price_data["Date"] >= start_date) & (daily_price_data["Date"] < end_date)]
-
-            if not group.empty:
-                group = group.head(15)  # Limit to the first 15 rows
-                price_array = group["Average"].tolist()
-
-                price_high = group["High"].max()
-                price_low = group["Low"].min()
-                price_average = group["Average"].mean()
-            else:
-                # If the group is empty, assign NaN or an appropriate default value
-                price_array = []
-                price_high = float("nan")
-                price_low = float("nan")
-                price_average = float("nan")
-
-            # Append the results to the respective lists
-            price_high_list.append(float(price_high))
-            price_low_list.append(float(price_low))
-            price_average_list.append(float(price_average))
-            price_collections.append(price_array)
-
-            # Update the start date to the current end date for the next iteration
-            start_date = end_date
-
-        # Handle the last report date (no next end date)
-        group = daily_price_data[daily_price_data["Date"] >= start_date]
-
-        if not group.empty:
-            group = group.head(15)
-            price_array = group["Average"].tolist()
-
-            price_high = group["High"].max()
-            price_low = group["Low"].min()
-            price_average = group["Average"].mean()
-        else:
-            price_array = []
-            price_high = float("nan")
-            price_low = float("nan")
-            price_average = float("nan")
-
-        # Append the results to the lists for the last report date
-        price_high_list.append(float(price_high))
-        price_low_list.append(float(price_low))
-        price_average_list.append(float(price_average))
-        price_collections.append(price_array)
-
-        # Add the new columns to the DataFrame
-        processed_data["Price_High"] = price_high_list
-        processed_data["Price_Low"] = price_low_list
-        processed_data["Price_Average"] = price_average_list
-        processed_data["Average_Price_Collection"] = price_collections
-
-        # Save the DataFrame to CSV
-        processed_data.to_parquet(self.model_training_data_path)
-        processed_data.to_csv(self.model_training_csv_path, index=False)
\ No newline at end of file
+        daily_price_data = daily_price_data.sort_values("Date", kind="stable").reset_index(drop=True)
+
+        window_aggregator = WindowAggregator(daily_price_data)
+        window_data = window_aggregator.aggregate(
+            processed_data["Date"], statistics, window_type=window_type, size=window_size
+        )
+        for column in window_data.columns:
+            processed_data[column] = window_data[column].values
+
+        pq.write_table(to_arrow_table(processed_data), self.model_training_data_path)
+        csv_data = processed_data.copy()
+        for column in get_array_columns(processed_data):
+            csv_data[column] = csv_data[column].map(to_list_literal)
+        csv_data.to_csv(self.model_training_csv_path, index=False)
+        self.instrumentation.write(self.model_training_data_path, rows=len(processed_data))
+        self.instrumentation.write(self.model_training_csv_path)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+class RollSchedule:
+    def __init__(self, trading_dates, report_dates, contract_sequence, roll_table):
+        self.dates = pd.to_datetime(pd.Series(trading_dates)).to_numpy(dtype="datetime64[ns]")
+        self.report_dates = pd.to_datetime(pd.Series(report_dates)).to_numpy(dtype="datetime64[ns]")
+        self.contract_sequence = list(contract_sequence)
+
+        # roll_table[month - 1] = (symbol, year offset) of the contract to hold after that month's report
+        self.roll_symbols = np.array([self.contract_sequence.index(symbol) for symbol, _ in roll_table])
+        self.roll_year_offsets = np.array([offset for _, offset in roll_table])
+
+    def get_roll_positions(self):
+        n_dates = len(self.dates)
+        if n_dates == 0 or len(self.report_dates) == 0:
+            return np.array([], dtype="int64")
+
+        # Each report rolls on the first trading date on/after it, and at most one report rolls per date
+        first_positions = np.searchsorted(self.dates, self.report_dates, side="left")
+        report_index = np.arange(len(first_positions))
+        positions = np.maximum.accumulate(first_positions - report_index) + report_index
+        positions = positions[positions < n_dates]
+
+        # Once the last report has rolled, every later trading date re-rolls on its own month
+        if len(positions) == len(self.report_dates):
+            positions = np.concatenate([positions[:-1], np.arange(positions[-1], n_dates)])
+        return positions
+
+    def get_contract_labels(self, symbols, years):
+        codes = years * len(self.contract_sequence) + symbols
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        labels = np.array(
+            [f"{self.contract_sequence[code % len(self.contract_sequence)]}{code // len(self.contract_sequence) % 100:02}" for code in unique_codes],
+            dtype=object,
+        )
+        return labels[inverse.reshape(codes.shape)]
+
+    def get_active_positions(self):
+        roll_index = np.full(len(self.dates), -1)
+        positions = self.get_roll_positions()
+        roll_index[positions] = positions
+        roll_index = np.maximum.accumulate(roll_index) if len(roll_index) else roll_index
+
+        active = np.flatnonzero(roll_index >= 0)
+        roll_dates = pd.DatetimeIndex(self.dates[roll_index[active]])
+        months = roll_dates.month.to_numpy() - 1
+
+        symbols = self.roll_symbols[months]
+        years = roll_dates.year.to_numpy() + self.roll_year_offsets[months]
+        return active, symbols, years
+
+    def active_contracts(self):
+        active, symbols, years = self.get_active_positions()
+        return self.dates[active], self.get_contract_labels(symbols, years)
+
+    def get_strip_positions(self, tenors=7):
+        # (active dates, dates x tenors symbol index, dates x tenors delivery year)
+        active, symbols, years = self.get_active_positions()
+
+        offsets = symbols[:, None] + np.arange(tenors)
+        strip_symbols = offsets % len(self.contract_sequence)
+        strip_years = years[:, None] + offsets // len(self.contract_sequence)
+        return active, strip_symbols, strip_years
+
+    def contract_strip(self, tenors=7):
+        active, strip_symbols, strip_years = self.get_strip_positions(tenors)
+        dates = np.repeat(self.dates[active], tenors)
+        return dates, self.get_contract_labels(strip_symbols, strip_years).ravel()
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+LOOKBACKS = (5, 20, 60)
+
+PRICE_COLUMNS = ["Date", "Contract", "High", "Low", "Average"]
+
+# Per-day series every feature is built from; stored with the features so appends can resume from them
+BASE_COLUMNS = ["Roll", "Return", "Adjusted Log Price", "True Range"]
+
+def get_base_series(contracts, high, low, average, previous=None):
+    # previous = (contract, average, adjusted log price) of the day before the first row, if any.
+    # A day whose contract differs from the previous day's is a roll: its return is zeroed so the
+    # contract switch is not read as a price move, and its true range ignores the old contract's close
+    contracts = np.asarray(contracts, dtype=object)
+    if previous is not None:
+        previous_contract, previous_average, previous_adjusted = previous
+    else:
+        previous_contract, previous_average, previous_adjusted = None, np.nan, 0.0
+
+    previous_contracts = np.concatenate([[previous_contract], contracts[:-1]])
+    previous_averages = np.concatenate([[previous_average], average[:-1]])
+    roll = contracts != previous_contracts
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(roll, 0.0, np.log(average / previous_averages))
+    adjusted = previous_adjusted + np.cumsum(returns)
+    true_range = np.where(
+        roll, high - low, np.maximum(high, previous_averages) - np.minimum(low, previous_averages)
+    )
+    return roll, returns, adjusted, true_range
+
+def window_sum(values, size):
+    # Trailing sums over `size` rows from one cumulative sum; NaN until the window is full
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    sums = np.full(len(values), np.nan)
+    sums[size - 1 :] = cumulative[size:] - cumulative[: len(values) - size + 1]
+    return sums
+
+def window_max(values, size):
+    # Trailing maxima in O(N) (van Herk/Gil-Werman): running maxima forward and backward within
+    # blocks of `size` rows; each window spans at most two blocks
+    n = len(values)
+    maxima = np.full(n, np.nan)
+    if n < size:
+        return maxima
+
+    padded = np.concatenate([values, np.full(-n % size, -np.inf)]).reshape(-1, size)
+    forward = np.maximum.accumulate(padded, axis=1).ravel()
+    backward = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    ends = np.arange(size - 1, n)
+    maxima[size - 1 :] = np.maximum(backward[ends - size + 1], forward[ends])
+    return maxima
+
+class RollingFeatureEngine:
+    def __init__(self, lookbacks=LOOKBACKS):
+        self.lookbacks = sorted(lookbacks)
+        self.capacity = self.lookbacks[-1] + 1
+
+        # Ring buffers over the last `capacity` days; self.count is the number of days seen
+        self.buffers = {column: np.zeros(self.capacity) for column in BASE_COLUMNS}
+        self.count = 0
+        self.last_contract = None
+        self.last_average = np.nan
+
+    def get_feature_columns(self, size=None):
+        sizes = self.lookbacks if size is None else [size]
+        return [
+            f"{feature} {size}d"
+            for size in sizes
+            for feature in ["Momentum", "Realized Vol", "ATR", "Drawdown", "Z-Score"]
+        ]
+
+    def get_columns(self):
+        return PRICE_COLUMNS + BASE_COLUMNS + self.get_feature_columns()
+
+    def compute_features(self, roll, returns, adjusted, true_range):
+        features = {}
+        valid_returns = (~roll).astype(float)
+        for size in self.lookbacks:
+            momentum = np.full(len(adjusted), np.nan)
+            momentum[size:] = adjusted[size:] - adjusted[:-size]
+
+            # Roll days carry no return, so variance is averaged over the days that do
+            observed = window_sum(valid_returns, size)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                variance = window_sum(returns ** 2, size) / observed
+            realized_vol = np.sqrt(variance * TRADING_DAYS_PER_YEAR)
+            realized_vol[observed < 2] = np.nan
+
+            mean = window_sum(adjusted, size) / size
+            std = np.sqrt(np.maximum(window_sum(adjusted ** 2, size) / size - mean ** 2, 0))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z_score = np.where(std > 1e-12, (adjusted - mean) / std, np.nan)
+
+            features[f"Momentum {size}d"] = momentum
+            features[f"Realized Vol {size}d"] = realized_vol
+            features[f"ATR {size}d"] = window_sum(true_range, size) / size
+            features[f"Drawdown {size}d"] = np.exp(adjusted - window_max(adjusted, size)) - 1
+            features[f"Z-Score {size}d"] = z_score
+        return features
+
+    def compute(self, continuous_data):
+        # Full pass over the continuous series; leaves the engine ready to append later days
+        continuous_data = continuous_data.sort_values("Date", kind="stable").reset_index(drop=True)
+        roll, returns, adjusted, true_range = get_base_series(
+            continuous_data["Contract"].astype(str).to_numpy(),
+            continuous_data["High"].to_numpy(dtype=np.float64),
+            continuous_data["Low"].to_numpy(dtype=np.float64),
+            continuous_data["Average"].to_numpy(dtype=np.float64),
+        )
+
+        features = continuous_data[PRICE_COLUMNS].copy()
+        for column, values in zip(BASE_COLUMNS, [roll, returns, adjusted, true_range]):
+            features[column] = values
+        for column, values in self.compute_features(roll, returns, adjusted, true_range).items():
+            features[column] = values
+
+        self.seed(features)
+        return features
+
+    def seed(self, features):
+        # Restore the ring buffers from the tail of a previously computed feature frame
+        tail = features.tail(self.capacity)
+        self.count = len(features)
+        for column in BASE_COLUMNS:
+            values = tail[column].to_numpy(dtype=np.float64)
+            positions = np.arange(self.count - len(values), self.count) % self.capacity
+            self.buffers[column][positions] = values
+        if len(features):
+            self.last_contract = str(features["Contract"].iloc[-1])
+            self.last_average = float(features["Average"].iloc[-1])
+        return self
+
+    def get_window(self, column, size):
+        # Last `size` days of a base series, oldest first
+        positions = np.arange(self.count - size, self.count) % self.capacity
+        return self.buffers[column][positions]
+
+    def append(self, date, contract, high, low, average):
+        # One new trading day in O(lookbacks x window) without touching earlier history
+        previous = (self.last_contract, self.last_average, self.get_window("Adjusted Log Price", 1)[0] if self.count else 0.0)
+        roll, returns, adjusted, true_range = [
+            values[0] for values in get_base_series([str(contract)], np.array([high]), np.array([low]), np.array([average]), previous)
+        ]
+
+        position = self.count % self.capacity
+        for column, value in zip(BASE_COLUMNS, [roll, returns, adjusted, true_range]):
+            self.buffers[column][position] = value
+        self.count += 1
+        self.last_contract, self.last_average = str(contract), float(average)
+
+        row = dict(zip(PRICE_COLUMNS, [date, contract, high, low, average]))
+        row.update(zip(BASE_COLUMNS, [roll, returns, adjusted, true_range]))
+        for size in self.lookbacks:
+            for column, value in self.get_latest_features(size).items():
+                row[column] = value
+        return row
+
+    def get_latest_features(self, size):
+        nan_features = dict.fromkeys(self.get_feature_columns(size), np.nan)
+        if self.count < size:
+            return nan_features
+
+        roll = self.get_window("Roll", size).astype(bool)
+        returns = self.get_window("Return", size)
+        adjusted = self.get_window("Adjusted Log Price", size)
+        observed = (~roll).sum()
+
+        features = dict(nan_features)
+        if self.count > size:
+            features[f"Momentum {size}d"] = adjusted[-1] - self.get_window("Adjusted Log Price", size + 1)[0]
+        if observed >= 2:
+            features[f"Realized Vol {size}d"] = np.sqrt((returns ** 2).sum() / observed * TRADING_DAYS_PER_YEAR)
+        features[f"ATR {size}d"] = self.get_window("True Range", size).mean()
+        features[f"Drawdown {size}d"] = np.exp(adjusted[-1] - adjusted.max()) - 1
+        std = adjusted.std()
+        if std > 1e-12:
+            features[f"Z-Score {size}d"] = (adjusted[-1] - adjusted.mean()) / std
+        return features
+
+    def is_current(self, features, continuous_data):
+        # Stored features can only be extended while every stored day still matches the continuous
+        # series: a corrected contract CSV can revise any earlier day, and each day's features
+        # depend on its whole lookback window and the adjusted price path before it
+        if list(features.columns) != self.get_columns():
+            return False
+        history = continuous_data.sort_values("Date", kind="stable").head(len(features))
+        if len(history) != len(features):
+            return False
+
+        if not np.array_equal(
+            pd.to_datetime(history["Date"]).to_numpy(dtype="datetime64[ns]"),
+            pd.to_datetime(features["Date"]).to_numpy(dtype="datetime64[ns]"),
+        ):
+            return False
+        if not np.array_equal(history["Contract"].astype(str).to_numpy(), features["Contract"].astype(str).to_numpy()):
+            return False
+        return all(
+            np.array_equal(history[column].to_numpy(dtype=np.float64), features[column].to_numpy(dtype=np.float64), equal_nan=True)
+            for column in ["High", "Low", "Average"]
+        )
+
+    def update(self, features, continuous_data):
+        # Append the continuous rows dated after the last computed day
+        self.seed(features)
+        last_date = pd.to_datetime(features["Date"]).max() if len(features) else None
+        new_data = continuous_data.sort_values("Date", kind="stable")
+        if last_date is not None:
+            new_data = new_data[pd.to_datetime(new_data["Date"]) > last_date]
+
+        rows = [
+            self.append(row.Date, row.Contract, row.High, row.Low, row.Average)
+            for row in new_data[PRICE_COLUMNS].itertuples(index=False)
+        ]
+        if not rows:
+            return features
+        return pd.concat([features, pd.DataFrame(rows, columns=features.columns)], ignore_index=True)
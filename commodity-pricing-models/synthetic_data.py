@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import pandas as pd
+
+from commodity_spec import MONTH_CODES, get_commodity_spec
+from wasde_processor import FILTER_CONDITIONS
+
+# Commodity label and attributes written for each report title, as in the 2021-2024 WASDE CSVs
+WASDE_TITLE_COMMODITIES = {
+    "World Corn Supply and Use": ("Corn", "Feed"),
+    "World Wheat Supply and Use": ("Wheat", "Feed"),
+    "World Soybean Supply and Use": ("Oilseed, Soybean", "Crush"),
+    "World Soybean Meal Supply and Use": ("Meal, Soybeans", None),
+    "World Soybean Oil Supply and Use": ("Oil, Soybeans", None),
+}
+
+def generate_trading_dates(start="2000-01-03", years=25):
+    dates = pd.bdate_range(start=start, periods=int(years * 261))
+    return pd.DataFrame({"Date": dates})
+
+def generate_report_dates(trading_dates):
+    # One release per month on the first trading day after the 9th, like the WASDE calendar
+    dates = pd.Series(pd.to_datetime(trading_dates["Date"]))
+    after_ninth = dates[dates.dt.day >= 10]
+    return after_ninth.groupby(after_ninth.dt.to_period("M")).first().reset_index(drop=True)
+
+def generate_price_path(rng, n_days, start_price=1000.0, volatility=0.015):
+    returns = rng.normal(0.0, volatility, n_days)
+    return start_price * np.exp(np.cumsum(returns))
+
+def write_contract_csv(path, dates, rng):
+    last = generate_price_path(rng, len(dates), start_price=rng.uniform(800, 1400))
+    open_price = last * np.exp(rng.normal(0.0, 0.004, len(dates)))
+    high = np.maximum(open_price, last) * (1 + rng.uniform(0.0, 0.01, len(dates)))
+    low = np.minimum(open_price, last) * (1 - rng.uniform(0.0, 0.01, len(dates)))
+    change = np.diff(last, prepend=last[0])
+
+    contract = pd.DataFrame({
+        "Time": dates.strftime("%m/%d/%Y"),
+        "Open": open_price.round(2),
+        "High": high.round(2),
+        "Low": low.round(2),
+        "Last": last.round(2),
+        "Change": change.round(2),
+        "%Chg": [f"{value:+.2f}%" for value in change / last * 100],
+        "Volume": rng.integers(0, 250_000, len(dates)),
+        "Open Int": rng.integers(0, 900_000, len(dates)),
+    })
+
+    # Barchart exports are newest first with a trailing footer row
+    contract.iloc[::-1].to_csv(path, index=False)
+    with open(path, "a") as file:
+        file.write('"Downloaded from Barchart.com as of 01-01-2000 00:00am CDT"\n')
+
+def generate_contract_csvs(output_dir, trading_dates, seed=0, listing_days=420, commodity="soybeans"):
+    os.makedirs(output_dir, exist_ok=True)
+    spec = get_commodity_spec(commodity)
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(pd.to_datetime(trading_dates["Date"]))
+
+    paths = []
+    for year in range(dates[0].year, dates[-1].year + 2):
+        for symbol in spec.contract_sequence:
+            # Each contract trades for ~20 months up to mid expiry month
+            expiry = pd.Timestamp(year=year, month=MONTH_CODES[symbol[-1]], day=14)
+            contract_dates = dates[(dates <= expiry) & (dates > expiry - pd.Timedelta(days=listing_days * 7 // 5))]
+            if len(contract_dates) == 0:
+                continue
+
+            path = os.path.join(output_dir, f"{symbol}{year % 100:02}.csv")
+            write_contract_csv(path, contract_dates, rng)
+            paths.append(path)
+    return paths
+
+def generate_wasde_csvs(output_dir, report_dates, commodities=1, seed=0):
+    # One long-format CSV per release. Extra commodities add report titles the filter discards,
+    # so file size grows with the commodity count while the filtered output stays fixed
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    titles = [(title, regions) for title, regions in FILTER_CONDITIONS]
+    titles += [
+        (f"World Commodity {i} Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"])
+        for i in range(max(commodities - 1, 0) * len(FILTER_CONDITIONS))
+    ]
+
+    paths = []
+    for report_date in pd.to_datetime(pd.Series(report_dates)):
+        records = []
+        for title, regions in titles:
+            commodity, use_attribute = WASDE_TITLE_COMMODITIES.get(title, (title.replace(" Supply and Use", ""), "Feed"))
+            attributes = ["Beginning Stocks", "Production", "Imports", use_attribute, "Total Use", "Exports", "Ending Stocks"]
+            attributes = [attribute for attribute in attributes if attribute is not None]
+
+            for region in regions:
+                for flag in ["Est.", "Proj."]:
+                    values = rng.uniform(1.0, 500.0, len(attributes)).round(2)
+                    for attribute, value in zip(attributes, values):
+                        records.append((title, attribute, commodity, region, flag, value, "Million Metric Tons"))
+
+        data = pd.DataFrame(records, columns=["ReportTitle", "Attribute", "Commodity", "Region", "ProjEstFlag", "Value", "Unit"])
+        data["ReleaseDate"] = report_date.strftime("%m/%d/%Y")
+        data["MarketYear"] = f"{report_date.year}/{(report_date.year + 1) % 100:02}"
+
+        path = os.path.join(output_dir, f"{report_date:%Y-%m}.csv")
+        data.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def generate_indicators_csv(path, report_dates, seed=0):
+    rng = np.random.default_rng(seed)
+    months = pd.to_datetime(pd.Series(report_dates)).dt.to_period("M").drop_duplicates()
+
+    indicators = pd.DataFrame({
+        "Date": months.astype(str).values,
+        "GDP (Bn USD)": rng.uniform(10_000, 30_000, len(months)).round(1),
+        "Gold": generate_price_path(rng, len(months), 300.0, 0.04).round(2),
+        "DX": generate_price_path(rng, len(months), 100.0, 0.02).round(4),
+        "Crude": generate_price_path(rng, len(months), 30.0, 0.08).round(2),
+        "USD?BRL": generate_price_path(rng, len(months), 2.0, 0.03).round(4),
+    })
+    indicators.to_csv(path, index=False)
+    return path
@@ -1,42 +1,252 @@
+import os
+import re
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from alignment import COT_PUBLICATION_LAG, INDICATOR_PUBLICATION_LAG, AsOfAligner
+from instrumentation import NULL_INSTRUMENTATION, instrumented
+from manifest import FileManifest, manifest_path
+
+FILTER_CONDITIONS = [
+    ("World Corn Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
+    ("World Wheat Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
+    ("World Soybean Supply and Use", ["World", "Argentina", "Brazil", "United States", "Major Exporters"]),
+    ("World Soybean Meal Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
+    ("World Soybean Oil Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
+]
+
+# WASDE attribute -> wasde_aggregate column; when several attributes feed one column the last record wins
+ATTRIBUTE_COLUMNS = {
+    "Beginning Stocks": "Beginning Stocks",
+    "Production": "Production",
+    "Imports": "Imports",
+    "Exports": "Exports",
+    "Feed": "Feed/Crush",
+    "Crush": "Feed/Crush",
+    "Total Use": "Total Use",
+    "Use, Total": "Total Use",
+    "Ending Stocks": "Ending Stocks",
+}
+
+COMMODITY_REPLACEMENTS = {
+    "OilSeed, Soybeans": "Soybeans",
+    "Oilseed, Soybean": "Soybeans",
+    "Meal, Soybeans": "Soybean Meal",
+    "Oil, Soybeans": "Soybean Oil",
+}
+
+# (output column, commodity, region, wasde_aggregate column) for the soybean model features
+SOYBEAN_FEATURES = [
+    ("STU, US", "Soybeans", "United States", "STU"),
+    ("STU, AR", "Soybeans", "Argentina", "STU"),
+    ("STU, BR", "Soybeans", "Brazil", "STU"),
+    ("STU, Corn", "Corn", "United States", "STU"),
+    ("Production, US", "Soybeans", "United States", "Production"),
+    ("Production, AR", "Soybeans", "Argentina", "Production"),
+    ("Production, BR", "Soybeans", "Brazil", "Production"),
+]
+
+WASDE_CSV_COLUMNS = ["ReportTitle", "Attribute", "Commodity", "Region", "ProjEstFlag", "Value", "Unit", "ReleaseDate"]
+
+GRAIN_ATTRIBUTES = ["Beginning Stocks", "Production", "Imports", "Feed", "Total Use", "Exports", "Ending Stocks"]
+OILSEED_ATTRIBUTES = ["Beginning Stocks", "Production", "Imports", "Crush", "Total Use", "Exports", "Ending Stocks"]
+PRODUCT_ATTRIBUTES = ["Beginning Stocks", "Production", "Imports", "Total Use", "Exports", "Ending Stocks"]
+
+# (table title, commodity, column attributes, regions) for the 2000-2010 fixed-width text reports,
+# named the same way as the World_WASDE_2000-2010 workbook
+TEXT_REPORT_TABLES = [
+    ("World Wheat Supply and Use", "Wheat", GRAIN_ATTRIBUTES, ["United States", "Major Exporters", "World"]),
+    ("World Corn Supply and Use", "Corn", GRAIN_ATTRIBUTES, ["United States", "Major Exporters", "World"]),
+    ("World Soybean Supply and Use", "OilSeed, Soybeans", OILSEED_ATTRIBUTES, ["United States", "Argentina", "Brazil", "World"]),
+    ("World Soybean Meal Supply and Use", "Meal, Soybeans", PRODUCT_ATTRIBUTES, ["United States", "Major Exporters", "World"]),
+    ("World Soybean Oil Supply and Use", "Oil, Soybeans", PRODUCT_ATTRIBUTES, ["United States", "Major Exporters", "World"]),
+]
+
+TEXT_REPORT_DATE = re.compile(r"([A-Z][a-z]+\.?\s+\d{1,2},\s+\d{4})")
+TEXT_REPORT_TITLE = re.compile(r"^(World .+ Supply and Use)\s+\d+/(\s+\(Cont'd\.\))?$")
+TEXT_REPORT_MONTH = re.compile(
+    r"\s*\b(January|February|March|April|May|June|July|August|September|October|November|December|"
+    r"Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Oct|Nov|Dec)$"
+)
+TEXT_REPORT_FOOTNOTE = re.compile(r"\s*\d+/")
+
+def pivot_last(data, keys, column, value, columns):
+    # One row per observed key combination, in groupby order, with one column per entry in `columns`
+    index = data.groupby(keys, observed=True, sort=True).size().index
+
+    records = data.dropna(subset=[column]).drop_duplicates(keys + [column], keep="last")
+    pivoted = records.set_index(keys + [column])[value].unstack(column)
+    pivoted = pivoted.reindex(index=index, columns=columns)
+    pivoted.columns = list(pivoted.columns)
+    return pivoted.reset_index()
+
+def read_wasde_csv(input_path, filter_conditions=FILTER_CONDITIONS, chunksize=100_000):
+    titles = [title for title, _ in filter_conditions]
+    allowed_pairs = pd.MultiIndex.from_tuples(
+        [(title, region) for title, regions in filter_conditions for region in regions]
+    )
+
+    # Only the needed columns are parsed and rows are filtered chunk by chunk,
+    # so memory is bounded by one chunk plus the (small) filtered pieces
+    pieces = []
+    for chunk in pd.read_csv(input_path, usecols=WASDE_CSV_COLUMNS, dtype=str, chunksize=chunksize):
+        chunk = chunk[chunk["ProjEstFlag"] == "Proj."]
+        chunk = chunk[pd.MultiIndex.from_frame(chunk[["ReportTitle", "Region"]]).isin(allowed_pairs)]
+        if not chunk.empty:
+            pieces.append(chunk)
+
+    if not pieces:
+        return pd.DataFrame(columns=["Report Date", "Commodity", "Region", "Attribute", "Value", "Unit"])
+
+    data = pd.concat(pieces, ignore_index=True)
+    data["Value"] = pd.to_numeric(data["Value"])
+
+    # Same row order as the per-title, per-ReleaseDate grouping of the original reader
+    data["Title Order"] = data["ReportTitle"].map({title: i for i, title in enumerate(titles)})
+    data = data.sort_values(["Title Order", "ReleaseDate"], kind="stable")
+
+    data = data[["ReleaseDate", "Commodity", "Region", "Attribute", "Value", "Unit"]]
+    return data.rename(columns={"ReleaseDate": "Report Date"}).reset_index(drop=True)
+
+def parse_report_value(value):
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
+
+def read_wasde_text(input_path, tables=TEXT_REPORT_TABLES):
+    table_config = {title: (commodity, attributes, regions) for title, commodity, attributes, regions in tables}
+    report_date = None
+    table = None
+    unit = None
+    projected = False
+    region = None
+    latest_rows = {}
+
+    with open(input_path, encoding="latin-1") as report:
+        for line in report:
+            stripped = line.strip()
+
+            if report_date is None:
+                match = TEXT_REPORT_DATE.search(stripped)
+                if match:
+                    report_date = pd.to_datetime(match.group(1).replace(".", ""), format="%B %d, %Y")
+                continue
+
+            title = TEXT_REPORT_TITLE.match(stripped) if "Supply and Use" in stripped else None
+            if title:
+                table = table_config.get(title.group(1))
+                projected = False
+                region = None
+                continue
+
+            if table is None:
+                continue
+            if stripped.startswith("1/"):
+                table = None
+                continue
+            if stripped.startswith("(") and stripped.endswith(")"):
+                unit = stripped[1:-1]
+                continue
+            if ":" not in line:
+                continue
+
+            label, values = line.split(":", 1)
+            label = TEXT_REPORT_FOOTNOTE.sub("", label).strip()
+            values = values.split()
+
+            # Marketing-year section headers, e.g. ":                 1999/00 (Projected)"
+            if not label and values and "/" in values[0]:
+                projected = "(Projected)" in line
+                region = None
+                continue
+
+            label = TEXT_REPORT_MONTH.sub("", label).strip()
+            if label:
+                region = label.title() if label.lower() == "major exporters" else label
+            if not projected or not values or region is None:
+                continue
+
+            commodity, attributes, regions = table
+            if region in regions and len(values) == len(attributes):
+                # Month lines run oldest to newest, so the last one seen is the current projection
+                latest_rows[(commodity, region)] = (attributes, values)
+
+    # Workbook order: non-World regions table by table, then the World rows
+    table_order = {commodity: (i, regions) for i, (_, commodity, _, regions) in enumerate(tables)}
+    ordered_rows = sorted(
+        latest_rows.items(),
+        key=lambda item: (item[0][1] == "World", table_order[item[0][0]][0], table_order[item[0][0]][1].index(item[0][1])),
+    )
+
+    records = []
+    for (commodity, region), (attributes, values) in ordered_rows:
+        for attribute, value in zip(attributes, values):
+            records.append((report_date, commodity, region, attribute, parse_report_value(value), unit))
+
+    return pd.DataFrame(records, columns=["Report Date", "Commodity", "Region", "Attribute", "Value", "Unit"])
+
 class WASDEProcessor:
-    def __init__(self, excel_path=None, csv_paths=None, csv_dir=None):
+    def __init__(
+        self,
+        excel_path=None,
+        csv_paths=None,
+        csv_dir=None,
+        text_dir=None,
+        max_workers=None,
+        chunksize=100_000,
+        instrumentation=None,
+    ):
         self.wasde_0010_path = excel_path
+        self.wasde_0010_text_dir = text_dir
         self.wasde_1020_path = csv_paths
         self.wasde_2124_path = csv_dir
 
-    def filter_by_commodity(self, data):
-        filter_conditions = [
-            ("World Corn Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
-            ("World Wheat Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
-            ("World Soybean Supply and Use", ["World", "Argentina", "Brazil", "United States", "Major Exporters"]),
-            ("World Soybean Meal Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
-            ("World Soybean Oil Supply and Use", ["World", "Major exporters", "United States", "Major Exporters"]),
-        ]
-
-        filtered_data = []
-        for title, regions in filter_conditions:
-            filtered = data[(data["ReportTitle"] == title) & (data["Region"].isin(regions))]
-            filtered_data.append(filtered)
-        return filtered_data
-
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.filter_conditions = FILTER_CONDITIONS
+        self.attribute_columns = ATTRIBUTE_COLUMNS
+        self.commodity_replacements = COMMODITY_REPLACEMENTS
+        self.soybean_features = SOYBEAN_FEATURES
+        self.text_report_tables = TEXT_REPORT_TABLES
+        self.updated_report_dates = None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+
+    @instrumented
     def process_csv_by_path(self, input_path, output_data):
-        data = pd.read_csv(input_path, low_memory=False)
-        data_collection = self.filter_by_commodity(data)
-
-        for data_set in data_collection:
-            data_set = data_set[data_set["ProjEstFlag"] == "Proj."]
-            grouped_data = data_set.groupby("ReleaseDate")
-
-            for _, group in grouped_data:
-                filtered_data = group[["ReleaseDate", "Commodity", "Region", "Attribute", "Value", "Unit"]]
-                filtered_data = filtered_data.rename(columns={"ReleaseDate": "Report Date"})
-                output_data = pd.concat([output_data, filtered_data], ignore_index=True)
-
-        return output_data
-
+        data = read_wasde_csv(input_path, self.filter_conditions, self.chunksize)
+        self.instrumentation.read(input_path, rows=len(data))
+        return pd.concat([output_data, data], ignore_index=True)
+
+    def read_paths(self, reader, input_paths, *reader_args):
+        input_paths = list(input_paths)
+
+        if self.max_workers == 1 or len(input_paths) <= 1:
+            results = [reader(path, *reader_args) for path in input_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(
+                    reader, input_paths, *[[reader_arg] * len(input_paths) for reader_arg in reader_args]
+                ))
+
+        for path, data in zip(input_paths, results):
+            self.instrumentation.read(path, rows=len(data))
+
+        results = [data for data in results if not data.empty]
+        if not results:
+            return pd.DataFrame(columns=["Report Date", "Commodity", "Region", "Attribute", "Value", "Unit"])
+        return pd.concat(results, ignore_index=True)
+
+    @instrumented
+    def read_csv_paths(self, input_paths):
+        return self.read_paths(read_wasde_csv, input_paths, self.filter_conditions, self.chunksize)
+
+    @instrumented
+    def read_text_paths(self, input_paths):
+        return self.read_paths(read_wasde_text, input_paths, self.text_report_tables)
+
+    @instrumented
     def clean_data(self, data):
         conversion_dict = {"Domestic Feed": "Feed", "Domestic Crush": "Crush", "Domestic Total": "Total Use"}
 
@@ -57,83 +267,106 @@ class WASDEProcessor:
 
         return sorted_data.reset_index(drop=True)
 
-    def process_wasde_data(self, output_path):
+    def get_source_paths(self):
+        if self.wasde_0010_text_dir is not None:
+            source_paths = sorted(Path(self.wasde_0010_text_dir).glob("*.txt"))
+        else:
+            source_paths = [Path(self.wasde_0010_path)]
+        csv_paths = [Path(path) for path in self.wasde_1020_path or []] + sorted(Path(self.wasde_2124_path).glob("*.csv"))
+        return source_paths, csv_paths
+
+    def read_source_paths(self, source_paths, csv_paths):
+        if self.wasde_0010_text_dir is not None:
+            wasde_data = self.read_text_paths(source_paths)
+        elif source_paths:
+            wasde_data = self.read_excel_path()
+        else:
+            wasde_data = pd.DataFrame(columns=["Report Date", "Commodity", "Region", "Attribute", "Value", "Unit"])
+
+        processed_data = self.read_csv_paths(csv_paths)
+        return pd.concat([wasde_data, processed_data], ignore_index=True)
+
+    @instrumented
+    def read_excel_path(self):
         wasde_raw = pd.read_excel(self.wasde_0010_path, sheet_name=None)
         wasde_data = pd.concat(wasde_raw.values(), ignore_index=True)
         wasde_data.rename(columns={"Country": "Region"}, inplace=True)
+        self.instrumentation.read(self.wasde_0010_path, rows=len(wasde_data))
+        return wasde_data
+
+    @instrumented
+    def process_wasde_data(self, output_path, incremental=False):
+        source_paths, csv_paths = self.get_source_paths()
+        input_paths = source_paths + csv_paths
+
+        manifest = FileManifest(manifest_path(output_path))
+        changed_paths = set(manifest.changed(input_paths))
+
+        # Each report file holds whole releases, so changed files replace their report dates.
+        # Removed files and a changed workbook (one file for the whole decade) need a full rebuild
+        rebuild = (
+            not incremental
+            or not manifest.entries
+            or not os.path.exists(output_path)
+            or bool(manifest.removed(input_paths))
+            or (self.wasde_0010_text_dir is None and bool(changed_paths & set(source_paths)))
+        )
 
-        processed_data = pd.DataFrame()
-        for path in self.wasde_1020_path:
-            processed_data = self.process_wasde_by_path(path, processed_data)
-
-        for file_path in Path(self.wasde_2124_path).glob("*.csv"):
-            processed_data = self.process_wasde_by_path(file_path, processed_data)
+        if rebuild:
+            wasde_data = self.clean_data(self.read_source_paths(source_paths, csv_paths))
+            self.updated_report_dates = None
+        elif changed_paths:
+            new_data = self.read_source_paths(
+                [path for path in source_paths if path in changed_paths],
+                [path for path in csv_paths if path in changed_paths],
+            )
+            new_data["Report Date"] = pd.to_datetime(new_data["Report Date"])
+            self.updated_report_dates = sorted(new_data["Report Date"].unique())
+
+            wasde_data = pd.read_parquet(output_path)
+            self.instrumentation.read(output_path, rows=len(wasde_data))
+            wasde_data = wasde_data[~wasde_data["Report Date"].isin(self.updated_report_dates)]
+            wasde_data = self.clean_data(pd.concat([wasde_data, new_data], ignore_index=True))
+        else:
+            self.updated_report_dates = []
+            wasde_data = None
+
+        if wasde_data is not None:
+            wasde_data.to_parquet(output_path, index=False)
+            self.instrumentation.write(output_path, rows=len(wasde_data))
+        manifest.update(input_paths)
+        manifest.save()
+
+    @instrumented
+    def aggregate_wasde_data(self, input_path, output_path, report_dates=None):
+        # With report_dates (e.g. updated_report_dates after an incremental run) only those
+        # releases are re-aggregated and the rest of the existing output is kept
+        if report_dates is not None and os.path.exists(output_path):
+            if len(report_dates) == 0:
+                return
+            report_dates = pd.to_datetime(pd.Series(report_dates))
+            processed_data = pd.read_parquet(input_path, filters=[("Report Date", "in", list(report_dates))])
+        else:
+            report_dates = None
+            processed_data = pd.read_parquet(input_path)
+        self.instrumentation.read(input_path, rows=len(processed_data))
+        processed_data = processed_data.drop(columns=["Unit"])
 
-        wasde_data = pd.concat([wasde_data, processed_data], ignore_index=True)
-        wasde_data = self.clean_data(wasde_data)
-        wasde_data.to_parquet(output_path, index=False)
+        aggregate_columns = list(dict.fromkeys(self.attribute_columns.values()))
 
-    def aggregate_wasde_data(self, input_path, output_path):
-        processed_data = pd.read_parquet(input_path)
-        processed_data = processed_data.drop(columns=["Unit"])
-        processed_rows = []
+        processed_data["Column"] = processed_data["Attribute"].astype(object).map(self.attribute_columns)
+        processed_data = pivot_last(
+            processed_data, ["Report Date", "Commodity", "Region"], "Column", "Value", aggregate_columns
+        )
 
-        replacements = {
-            "OilSeed, Soybeans": "Soybeans",
-            "Oilseed, Soybean": "Soybeans",
-            "Meal, Soybeans": "Soybean Meal",
-            "Oil, Soybeans": "Soybean Oil",
-        }
+        # STU is only defined when ending stocks are non-zero. Python's round() is kept over
+        # Series.round() since the latter can differ in the last digit on half-way cases
+        ending_stocks = processed_data["Ending Stocks"]
+        stu = (ending_stocks / processed_data["Total Use"]).where(ending_stocks != 0)
+        processed_data["STU"] = stu.map(lambda ratio: round(ratio, 4))
 
-        grouped = processed_data.groupby(["Report Date", "Commodity", "Region"])
-
-        for (report_date, commodity, region), group in grouped:
-            aggregate_row = {
-                "Report Date": report_date,
-                "Commodity": commodity,
-                "Region": region,
-                "Beginning Stocks": None,
-                "Production": None,
-                "Imports": None,
-                "Exports": None,
-                "Feed/Crush": None,
-                "Total Use": None,
-                "Ending Stocks": None,
-                "STU": None,
-            }
-
-            ending_stocks = None
-            total_use = None
-            stu = None
-            for _, record in group.iterrows():
-                attribute = record["Attribute"]
-                value = record["Value"]
-
-                if attribute == "Beginning Stocks":
-                    aggregate_row["Beginning Stocks"] = value
-                elif attribute == "Production":
-                    aggregate_row["Production"] = value
-                elif attribute == "Imports":
-                    aggregate_row["Imports"] = value
-                elif attribute == "Exports":
-                    aggregate_row["Exports"] = value
-                elif attribute in ["Feed", "Crush"]:
-                    aggregate_row["Feed/Crush"] = value
-                elif attribute in ["Total Use", "Use, Total"]:
-                    aggregate_row["Total Use"] = value
-                    total_use = value
-                elif attribute == "Ending Stocks":
-                    aggregate_row["Ending Stocks"] = value
-                    ending_stocks = value
-
-            if ending_stocks and total_use is not None:
-                stu = round(ending_stocks / total_use, 4)
-                aggregate_row["STU"] = stu
-
-            processed_rows.append(aggregate_row)
-
-        processed_data = pd.DataFrame(processed_rows)
-        processed_data["Commodity"] = processed_data["Commodity"].replace(replacements)
+        processed_data["Commodity"] = processed_data["Commodity"].astype(str).replace(self.commodity_replacements)
+        processed_data["Region"] = processed_data["Region"].astype(str)
 
         dtype_aggregate_data = {
             "Report Date": "datetime64[ns]",
@@ -149,46 +382,35 @@ class WASDEProcessor:
             "STU": "float64"
         }
 
+        if report_dates is not None:
+            # Releases are disjoint, so a stable sort on the date alone keeps the full-run row order
+            existing_data = pd.read_parquet(output_path)
+            self.instrumentation.read(output_path, rows=len(existing_data))
+            existing_data = existing_data[~existing_data["Report Date"].isin(report_dates)]
+            processed_data = pd.concat([existing_data, processed_data], ignore_index=True)
+            processed_data = processed_data.sort_values("Report Date", kind="stable").reset_index(drop=True)
+
         processed_data = processed_data.astype(dtype_aggregate_data)
         processed_data.to_parquet(output_path, index=False)
+        self.instrumentation.write(output_path, rows=len(processed_data))
 
+    @instrumented
     def filter_soybeans_wasde_data(self, data_path, output_path):
         data = pd.read_parquet(data_path)
+        self.instrumentation.read(data_path, rows=len(data))
         data["Report Date"] = pd.to_datetime(data["Report Date"])
-        data["Report Month"] = data["Report Date"].dt.to_period("M")
-        filtered_rows = []
-
-        grouped = data.groupby("Report Date")
-
-        for report_date, group in grouped:
-            soybean_row = {
-                "Report Date": report_date,
-                "Report Month": report_date.to_period("M"),
-                "STU, US": None,
-                "STU, AR": None,
-                "STU, BR": None,
-                "STU, Corn": None,
-                "Production, US": None,
-                "Production, AR": None,
-                "Production, BR": None,
-            }
-
-            for _, row in group.iterrows():
-                if row["Commodity"] == "Soybeans":
-                    if row["Region"] == "United States":
-                        soybean_row["STU, US"] = row["STU"]
-                        soybean_row["Production, US"] = row["Production"]
-                    elif row["Region"] == "Argentina":
-                        soybean_row["STU, AR"] = row["STU"]
-                        soybean_row["Production, AR"] = row["Production"]
-                    elif row["Region"] == "Brazil":
-                        soybean_row["STU, BR"] = row["STU"]
-                        soybean_row["Production, BR"] = row["Production"]
-
-                if row["Commodity"] == "Corn" and row["Region"] == "United States":
-                    soybean_row["STU, Corn"] = row["STU"]
-
-            filtered_rows.append(soybean_row)
+        feature_columns = [feature for feature, _, _, _ in self.soybean_features]
+
+        features = pd.DataFrame(self.soybean_features, columns=["Feature", "Commodity", "Region", "Source"])
+        records = data.assign(Commodity=data["Commodity"].astype(str), Region=data["Region"].astype(str))
+        records = records.merge(features, on=["Commodity", "Region"], how="left", sort=False)
+        records["Value"] = float("nan")
+        for source in features["Source"].unique():
+            matched = records["Source"] == source
+            records.loc[matched, "Value"] = records.loc[matched, source]
+
+        processed_data = pivot_last(records, ["Report Date"], "Feature", "Value", feature_columns)
+        processed_data.insert(1, "Report Month", processed_data["Report Date"].dt.to_period("M").dt.to_timestamp())
 
         dtype_soybean_row = {
             "Report Date": "datetime64[ns]",
@@ -202,23 +424,32 @@ class WASDEProcessor:
             "Production, BR": "float64",
         }
 
-        processed_data = pd.DataFrame(filtered_rows)
         processed_data = processed_data.astype(dtype_soybean_row)
         processed_data.to_parquet(output_path, index=False)
+        self.instrumentation.write(output_path, rows=len(processed_data))
 
-    def append_indicators(self, data_path, indicator_path, output_path):
+    @instrumented
+    def append_indicators(self, data_path, indicator_path, output_path, indicator_lag=INDICATOR_PUBLICATION_LAG):
         data = pd.read_parquet(data_path)
-        indicators = pd.read_csv(indicator_path, low_memory=False)
+        if str(indicator_path).endswith(".parquet"):
+            indicators = pd.read_parquet(indicator_path)
+        else:
+            indicators = pd.read_csv(indicator_path, low_memory=False)
+        self.instrumentation.read(data_path, rows=len(data))
+        self.instrumentation.read(indicator_path, rows=len(indicators))
+
+        # Monthly indicators are dated at the last day of their month, so a release only sees months
+        # that closed indicator_lag before it; indicator_lag=None restores the original same-month lookup
+        months = pd.to_datetime(indicators["Date"]).dt.to_period("M")
+        if indicator_lag is None:
+            indicators["Date"] = months.dt.to_timestamp()
+        else:
+            indicators["Date"] = months.dt.end_time.dt.normalize()
+        aligned_indicators = AsOfAligner(data["Report Date"]).add_series(indicators, "Date", lag=indicator_lag).align()
+        merged_data = pd.concat([data.drop(columns=["Report Month"], errors="ignore"), aligned_indicators], axis=1)
 
-        data["Report Month"] = pd.to_datetime(data["Report Date"]).dt.to_period("M")
-        indicators["Date"] = pd.to_datetime(indicators["Date"]).dt.to_period("M")
-
-        merged_data = pd.merge(
-        data, indicators, how="left", left_on="Report Month", right_on="Date"
-        )
-    
         dtype_merged_data = {
-            "Report Date": "datetime64[D]",
+            "Report Date": "datetime64[ns]",
             "STU, US": "float64",
             "STU, AR": "float64",
             "STU, BR": "float64",
@@ -233,6 +464,21 @@ class WASDEProcessor:
             "USD?BRL": "float64"
         }
 
-        merged_data.drop(columns=["Report Month", "Date"], inplace=True)
         merged_data = merged_data.astype(dtype_merged_data)
-        merged_data.to_parquet(output_path, index=False)
\ No newline at end of file
+        merged_data.to_parquet(output_path, index=False)
+        self.instrumentation.write(output_path, rows=len(merged_data))
+
+    @instrumented
+    def append_cot_positions(self, data_path, cot_paths, output_path, lag=COT_PUBLICATION_LAG):
+        data = pd.read_parquet(data_path)
+        self.instrumentation.read(data_path, rows=len(data))
+
+        cot_data = AsOfAligner(data["Report Date"]).add_cot_positions(cot_paths, lag).align()
+        for path in cot_paths:
+            self.instrumentation.read(path)
+
+        data = data.drop(columns=[column for column in cot_data.columns if column in data.columns])
+        data = pd.concat([data, cot_data.astype("float64")], axis=1)
+
+        data.to_parquet(output_path, index=False)
+        self.instrumentation.write(output_path, rows=len(data))
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+def window_max(windows, mask, column):
+    values = np.where(mask, windows[column], -np.inf).max(axis=1, initial=-np.inf)
+    return np.where(mask.any(axis=1), values, np.nan)
+
+def window_min(windows, mask, column):
+    values = np.where(mask, windows[column], np.inf).min(axis=1, initial=np.inf)
+    return np.where(mask.any(axis=1), values, np.nan)
+
+def window_mean(windows, mask, column):
+    counts = mask.sum(axis=1)
+    totals = np.where(mask, windows[column], 0.0).sum(axis=1)
+    return np.divide(totals, counts, out=np.full(len(counts), np.nan), where=counts > 0)
+
+def window_close(windows, mask, column):
+    counts = mask.sum(axis=1)
+    last = np.clip(counts - 1, 0, None)
+    values = windows[column][np.arange(len(counts)), last] if windows[column].shape[1] else np.full(len(counts), np.nan)
+    return np.where(counts > 0, values, np.nan)
+
+def window_realized_vol(windows, mask, column):
+    # Standard deviation of daily log returns inside the window
+    prices = np.where(mask, windows[column], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(prices), axis=1)
+    valid = ~np.isnan(returns)
+    counts = valid.sum(axis=1)
+
+    means = np.divide(np.where(valid, returns, 0.0).sum(axis=1), counts, out=np.zeros(len(counts)), where=counts > 0)
+    squares = np.where(valid, (returns - means[:, None]) ** 2, 0.0).sum(axis=1)
+    return np.divide(squares, counts - 1, out=np.full(len(counts), np.nan), where=counts > 1) ** 0.5
+
+def window_collection(windows, mask, column):
+    return np.where(mask, windows[column], np.nan)
+
+STATISTICS = {
+    "max": window_max,
+    "min": window_min,
+    "mean": window_mean,
+    "close": window_close,
+    "realized_vol": window_realized_vol,
+    "collection": window_collection,
+}
+
+# (output column, statistic, source column) matching the original model input features
+MODEL_INPUT_STATISTICS = [
+    ("Price_High", "max", "High"),
+    ("Price_Low", "min", "Low"),
+    ("Price_Average", "mean", "Average"),
+    ("Average_Price_Collection", "collection", "Average"),
+]
+
+class WindowAggregator:
+    window_types = ("after", "calendar", "lookback")
+
+    def __init__(self, daily_data, statistics=None):
+        # daily_data must be sorted by Date
+        self.dates = pd.to_datetime(daily_data["Date"]).to_numpy(dtype="datetime64[ns]")
+        self.daily_data = daily_data
+        self.statistics = dict(STATISTICS)
+        if statistics:
+            self.statistics.update(statistics)
+
+    def get_window_bounds(self, release_dates, window_type="after", size=15, bounded=True):
+        if window_type not in self.window_types:
+            raise ValueError(f"Unknown window type: {window_type}")
+
+        release_dates = pd.to_datetime(pd.Series(release_dates)).to_numpy(dtype="datetime64[ns]")
+        release_positions = np.searchsorted(self.dates, release_dates, side="left")
+
+        if window_type == "lookback":
+            # `size` trading days strictly before each release
+            stop = release_positions
+            start = np.maximum(stop - size, 0)
+            return start, stop
+
+        start = release_positions
+        if window_type == "after":
+            stop = np.minimum(start + size, len(self.dates))
+        else:
+            # `size` calendar days starting on the release date
+            stop = np.searchsorted(self.dates, release_dates + np.timedelta64(size, "D"), side="left")
+
+        if bounded:
+            next_positions = np.append(release_positions[1:], len(self.dates))
+            stop = np.minimum(stop, np.maximum(next_positions, start))
+        return start, stop
+
+    def get_windows(self, columns, start, stop, width=None):
+        if width is None:
+            width = int((stop - start).max()) if len(start) else 0
+        offsets = start[:, None] + np.arange(width)
+        mask = offsets < stop[:, None]
+        offsets = np.where(mask, offsets, 0)
+
+        windows = {}
+        for column in columns:
+            values = self.daily_data[column].to_numpy(dtype="float64")
+            windows[column] = values[offsets] if len(values) else np.full(offsets.shape, np.nan)
+        return windows, mask
+
+    def aggregate(self, release_dates, statistics=MODEL_INPUT_STATISTICS, window_type="after", size=15, bounded=True):
+        start, stop = self.get_window_bounds(release_dates, window_type, size, bounded)
+
+        columns = {column for _, _, column in statistics}
+        width = None if window_type == "calendar" else size
+        windows, mask = self.get_windows(sorted(columns), start, stop, width)
+
+        results = {}
+        for output_column, statistic, column in statistics:
+            values = self.statistics[statistic](windows, mask, column)
+            if values.ndim == 2:
+                values = self.to_array_column(values)
+            results[output_column] = values
+        return pd.DataFrame(results)
+
+    @staticmethod
+    def to_array_column(values):
+        # One fixed-width float array per row; see to_arrow_table for how it is stored
+        return list(values)
+
+def get_array_columns(frame):
+    return [
+        column
+        for column in frame.columns
+        if frame[column].dtype == object and len(frame) and isinstance(frame[column].iloc[0], np.ndarray)
+    ]
+
+def to_arrow_table(frame):
+    # Array columns are stored as fixed_size_list<double>, so every row keeps the window width
+    table = pa.Table.from_pandas(frame)
+    for column in get_array_columns(frame):
+        values = np.stack(frame[column].to_numpy())
+        array = pa.FixedSizeListArray.from_arrays(pa.array(values.ravel()), values.shape[1])
+        table = table.set_column(table.schema.get_field_index(column), column, array)
+    return table
+
+def to_list_literal(values):
+    # "[504.25, 511.625]" as in the original CSV, without the NaN padding after the window's last day
+    valid = np.flatnonzero(~np.isnan(values))
+    return str([float(value) for value in values[: valid[-1] + 1]] if len(valid) else [])